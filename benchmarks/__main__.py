@@ -0,0 +1,140 @@
+"""
+Benchmarks för text- och PDF-parsern på syntetiska exporter:
+
+    python -m benchmarks --storlekar 100 10000 100000 --pdf-storlekar 100 1000
+
+Exporterna genereras en gång och sparas i --katalog. Varje steg körs i en
+egen process och rapporterar tid, genomströmning (artiklar/s och MB/s) och
+topp-RSS. Med gränser (granser.json som standard) avslutas körningen med
+felkod 1 om något steg är långsammare eller drar mer minne än tillåtet.
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import sys
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+
+from .korpus import TEXTFORMAT, pdfexport, skriv_textexport
+from .steg import PDFSTEG, STEG, TEXTSTEG, mät
+
+STANDARDGRÄNSER = os.path.join(os.path.dirname(__file__), "granser.json")
+
+
+def förbered_filer(katalog, storlekar, pdfstorlekar, format_):
+    """
+    Genererar de exporter som saknas och returnerar [(typ, format, antal, sökväg)]
+    """
+    os.makedirs(katalog, exist_ok=True)
+    filer = []
+    for antal in storlekar:
+        for filformat in format_:
+            sökväg = os.path.join(katalog, f"{filformat}_{antal}.txt")
+            if not os.path.exists(sökväg):
+                print(f"Genererar {sökväg}...", file=sys.stderr)
+                with open(sökväg + ".tmp", "wb") as f:
+                    skriv_textexport(f, antal, filformat)
+                os.replace(sökväg + ".tmp", sökväg)
+            filer.append(("text", filformat, antal, sökväg))
+    for antal in pdfstorlekar:
+        sökväg = os.path.join(katalog, f"pdf_{antal}.pdf")
+        if not os.path.exists(sökväg):
+            print(f"Genererar {sökväg}...", file=sys.stderr)
+            with open(sökväg + ".tmp", "wb") as f:
+                f.write(pdfexport(antal))
+            os.replace(sökväg + ".tmp", sökväg)
+        filer.append(("pdf", "pdf", antal, sökväg))
+    return filer
+
+
+def kör_steg(namn, sökväg):
+    # En ny process per mätning, så att varken minne eller cachar ärvs
+    with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context("spawn")) as pool:
+        return pool.submit(mät, namn, sökväg).result()
+
+
+def överträdelser(resultat, gränser):
+    """
+    Gränser per steg: min_artiklar_per_s, min_mb_per_s, max_sekunder och
+    max_topp_rss_mb. "min_storlek" begränsar en gräns till större exporter.
+    """
+    fel = []
+    gräns = gränser.get(resultat["steg"], {})
+    if resultat["antal_artiklar"] < gräns.get("min_storlek", 0):
+        return fel
+    kontroller = [
+        ("min_artiklar_per_s", "artiklar_per_s", lambda v, g: v < g),
+        ("min_mb_per_s", "mb_per_s", lambda v, g: v < g),
+        ("max_sekunder", "sekunder", lambda v, g: v > g),
+        ("max_topp_rss_mb", "topp_rss_mb", lambda v, g: v is not None and v > g),
+    ]
+    for nyckel, fält, överskriden in kontroller:
+        if nyckel in gräns and överskriden(resultat[fält], gräns[nyckel]):
+            fel.append(f"{resultat['steg']} ({resultat['format']}, {resultat['antal_artiklar']:,}): "
+                       f"{fält} = {resultat[fält]:,.1f}, gräns {nyckel} = {gräns[nyckel]:,}")
+    return fel
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks", description="Benchmarks för retrieverparser.")
+    parser.add_argument("--storlekar", type=int, nargs="*", default=[100, 10_000],
+                        help="antal artiklar per textexport (100 till 1 000 000)")
+    parser.add_argument("--pdf-storlekar", type=int, nargs="*", default=[100],
+                        help="antal artiklar per PDF-export")
+    parser.add_argument("--format", nargs="+", default=list(TEXTFORMAT), choices=TEXTFORMAT,
+                        help="textformat att generera")
+    parser.add_argument("--steg", nargs="+", choices=list(STEG), help="kör bara dessa steg")
+    parser.add_argument("--katalog", default=os.path.join(tempfile.gettempdir(), "retrieverparser-benchmarks"),
+                        help="var de genererade exporterna sparas och återanvänds")
+    parser.add_argument("--gränser", default=STANDARDGRÄNSER, help="JSON-fil med gränser per steg")
+    parser.add_argument("--inga-gränser", action="store_true", help="rapportera bara, kontrollera inga gränser")
+    parser.add_argument("--json", help="spara resultaten som JSON")
+    argument = parser.parse_args(argv)
+    
+    gränser = {}
+    if not argument.inga_gränser and argument.gränser:
+        with open(argument.gränser, encoding="utf-8") as f:
+            gränser = json.load(f)
+    
+    filer = förbered_filer(argument.katalog, argument.storlekar, argument.pdf_storlekar, argument.format)
+    
+    print(f"{'steg':<18} {'format':<12} {'artiklar':>10} {'s':>8} {'artiklar/s':>12} {'MB/s':>8} {'topp-RSS MB':>12}")
+    resultat = []
+    fel = []
+    for typ, filformat, antal, sökväg in filer:
+        storlek_mb = os.path.getsize(sökväg) / 2**20
+        for namn in (TEXTSTEG if typ == "text" else PDFSTEG):
+            if argument.steg and namn not in argument.steg:
+                continue
+            mätning = kör_steg(namn, sökväg)
+            sekunder = max(mätning["sekunder"], 1e-9)
+            rad = {
+                "steg": namn,
+                "format": filformat,
+                "antal_artiklar": antal,
+                "fil_mb": storlek_mb,
+                **mätning,
+                "artiklar_per_s": antal / sekunder,
+                "mb_per_s": storlek_mb / sekunder,
+            }
+            resultat.append(rad)
+            topp = f"{rad['topp_rss_mb']:,.0f}" if rad["topp_rss_mb"] is not None else "-"
+            print(f"{namn:<18} {filformat:<12} {antal:>10,} {rad['sekunder']:>8.3f} "
+                  f"{rad['artiklar_per_s']:>12,.0f} {rad['mb_per_s']:>8.1f} {topp:>12}", flush=True)
+            fel.extend(överträdelser(rad, gränser))
+    
+    if argument.json:
+        with open(argument.json, "w", encoding="utf-8") as f:
+            json.dump(resultat, f, ensure_ascii=False, indent=2)
+    
+    if fel:
+        print("\nGränser överskridna:", file=sys.stderr)
+        for rad in fel:
+            print(f"  {rad}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
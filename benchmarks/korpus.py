@@ -0,0 +1,217 @@
+"""
+Syntetiska Retriever-exporter för benchmarks: textexporter i alla format
+som retrieverrens känner igen, och PDF-exporter med innehållsförteckning
+och artikelsidor så som extract_toc_from_pdf och process_single_article
+förväntar sig dem.
+"""
+import codecs
+import random
+import zlib
+
+TEXTFORMAT = ("modern", "äldre", "webbartikel")
+
+_ORD = (
+    "kommunen regeringen skolan polisen vården budgeten förslaget rapporten "
+    "invånarna beslutet debatten tidningen länet staden frågan arbetet året "
+    "veckan uppgifter enligt därför också mycket flera bara redan under efter"
+).split()
+
+_HUVUD = "Linnéuniversitetet BIBSAM (Växjö)\nDatum 2026-01-28\n\nNyheter:\n\n"
+_SEPARATOR = "=" * 78 + "\n\n"
+
+
+def _stycke(slump, ord_antal):
+    ord_ = [slump.choice(_ORD) for _ in range(ord_antal)]
+    return " ".join(ord_).capitalize() + "."
+
+
+def textartikel(nr, filformat, slump):
+    """
+    En artikel i textexportens form, med separatorraden på slutet
+    """
+    tidning = f"Tidning {nr % 37}"
+    if nr % 11 == 0:
+        # Tidningsnamn med kommatecken ger tre delar i "tidning, datum"
+        tidning = f"Tidning {nr % 37}, Lokal"
+    datum = f"20{10 + nr % 15}-{nr % 12 + 1:02d}-{nr % 28 + 1:02d}"
+    stycken = "\n\n".join(_stycke(slump, slump.randint(20, 80)) for _ in range(slump.randint(1, 6)))
+    huvud = f"Rubrik {nr}: {_stycke(slump, 5)}\n{tidning}, {datum}\nSida {nr % 40 + 1}\nPublicerat i print.\n\n{stycken}\n\n"
+    länk = f"http://ret.nu/{nr:08d}X"
+    
+    if filformat == "modern":
+        if nr % 5 == 0:
+            fot = f"Se webartikeln på\n{länk}\n"
+        else:
+            fot = f"Alla artiklar är skyddade av upphovsrättslagen och får inte sparas.\nLäs hela artikeln på\n{länk}\n"
+    elif filformat == "äldre":
+        fortsättning = "Se webartikeln på" if nr % 5 == 0 else "Läs hela artikeln på"
+        fot = f"© {tidning.split(',')[0]} 20{10 + nr % 15}\n\n{fortsättning} {länk}\n"
+    elif filformat == "webbartikel":
+        fot = f"Se webartikeln på\n{länk}\n"
+    else:
+        raise ValueError(f"okänt format: {filformat}")
+    return huvud + fot + _SEPARATOR
+
+
+def skriv_textexport(fil, antal, filformat="modern", kodning="utf-16", frö=0):
+    """
+    Skriver en textexport med `antal` artiklar till en binär fil, bit för
+    bit, med Windows-radslut och (som standard) UTF-16 med BOM
+    """
+    slump = random.Random(frö)
+    kodare = codecs.getincrementalencoder(kodning)()
+    bit = [_HUVUD]
+    for nr in range(antal):
+        bit.append(textartikel(nr, filformat, slump))
+        if len(bit) >= 1000:
+            fil.write(kodare.encode("".join(bit).replace("\n", "\r\n")))
+            bit = []
+    fil.write(kodare.encode("".join(bit).replace("\n", "\r\n"), final=True))
+
+
+# Tecknet som skiljer rubrik från tidning i PDF:ens innehållsförteckning
+PDF_AVSKILJARE = ""
+
+# ToUnicode-tabell: kod 0x01 blir avskiljaren, resten är Latin-1
+_CMAP = b"""/CIDInit /ProcSet findresource begin 12 dict begin begincmap /CMapName /Retriever def
+1 begincodespacerange <00> <FF> endcodespacerange
+1 beginbfchar <01> <E618> endbfchar
+2 beginbfrange <20> <7E> <0020> <A0> <FF> <00A0> endbfrange
+endcmap CMapName currentdict /CMap defineresource pop end end"""
+
+_SIDHUVUD = ["Tidningsartiklar - Kandidatuppsats", "Datum 2026-01-28"]
+TOC_PER_SIDA = 40
+
+
+def _pdfsträng(text):
+    kod = bytearray()
+    for tecken in text:
+        if tecken == PDF_AVSKILJARE:
+            kod.append(1)
+        else:
+            kod.append(ord(tecken) if ord(tecken) < 256 else ord("?"))
+    return bytes(kod).replace(b"\\", b"\\\\").replace(b"(", b"\\(").replace(b")", b"\\)")
+
+
+def _sidinnehåll(rader):
+    delar = [b"BT /F1 10 Tf 12 TL 50 800 Td"]
+    delar.extend(b"(" + _pdfsträng(rad) + b") '" for rad in rader)
+    delar.append(b"ET")
+    return zlib.compress(b"\n".join(delar))
+
+
+def _bygg_pdf(sidor, länkar, bokmärken=None):
+    """
+    Minimal PDF: en Helvetica-font med ToUnicode, en innehållsström per sida,
+    URI-länkar och eventuellt bokmärken (sidindex per rubrik)
+    """
+    objekt = []
+    
+    def lägg_till(data):
+        objekt.append(data)
+        return len(objekt)
+    
+    cmap = lägg_till(b"<< /Length %d >>\nstream\n%s\nendstream" % (len(_CMAP), _CMAP))
+    font = lägg_till(
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding /ToUnicode %d 0 R >>" % cmap
+    )
+    sidträd = lägg_till(None)
+    
+    barn = []
+    for nr, rader in enumerate(sidor):
+        data = _sidinnehåll(rader)
+        innehåll = lägg_till(b"<< /Length %d /Filter /FlateDecode >>\nstream\n%s\nendstream" % (len(data), data))
+        annoteringar = [
+            lägg_till(
+                b"<< /Type /Annot /Subtype /Link /Rect [50 50 200 62] /Border [0 0 0] "
+                b"/A << /S /URI /URI (%s) >> >>" % uri.encode("ascii")
+            )
+            for uri in länkar.get(nr, [])
+        ]
+        annots = b" /Annots [%s]" % b" ".join(b"%d 0 R" % a for a in annoteringar) if annoteringar else b""
+        barn.append(lägg_till(
+            b"<< /Type /Page /Parent %d 0 R /MediaBox [0 0 595 842] /Contents %d 0 R "
+            b"/Resources << /Font << /F1 %d 0 R >> >>%s >>" % (sidträd, innehåll, font, annots)
+        ))
+    objekt[sidträd - 1] = b"<< /Type /Pages /Kids [%s] /Count %d >>" % (
+        b" ".join(b"%d 0 R" % b for b in barn), len(barn)
+    )
+    
+    extra = b""
+    if bokmärken:
+        rot = lägg_till(None)
+        första = len(objekt) + 1
+        for nr, (titel, sida) in enumerate(bokmärken):
+            post = b"<< /Title <FEFF%s> /Parent %d 0 R /Dest [%d 0 R /XYZ 0 842 0]" % (
+                titel.encode("utf-16-be").hex().encode("ascii"), rot, barn[sida]
+            )
+            if nr > 0:
+                post += b" /Prev %d 0 R" % (första + nr - 1)
+            if nr + 1 < len(bokmärken):
+                post += b" /Next %d 0 R" % (första + nr + 1)
+            lägg_till(post + b" >>")
+        objekt[rot - 1] = b"<< /Type /Outlines /First %d 0 R /Last %d 0 R /Count %d >>" % (
+            första, första + len(bokmärken) - 1, len(bokmärken)
+        )
+        extra = b" /Outlines %d 0 R" % rot
+    katalog = lägg_till(b"<< /Type /Catalog /Pages %d 0 R%s >>" % (sidträd, extra))
+    
+    ut = bytearray(b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")
+    positioner = []
+    for nr, data in enumerate(objekt):
+        positioner.append(len(ut))
+        ut += b"%d 0 obj\n%s\nendobj\n" % (nr + 1, data)
+    xref = len(ut)
+    ut += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objekt) + 1)
+    ut += b"".join(b"%010d 00000 n \n" % p for p in positioner)
+    ut += b"trailer\n<< /Size %d /Root %d 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objekt) + 1, katalog, xref)
+    return bytes(ut)
+
+
+def pdfexport(antal, bokmärken=False, frö=0):
+    """
+    En PDF-export med `antal` artiklar: först innehållsförteckningen
+    ("rubrik  tidning datum sida"), sedan en eller två sidor per artikel
+    med källrad, författare, text, copyrightrad och en ret.nu-länk
+    """
+    slump = random.Random(frö)
+    toc_sidor = max(5, -(-antal // TOC_PER_SIDA))
+    poster = []
+    artikelsidor = []
+    sida = toc_sidor + 1
+    
+    for nr in range(antal):
+        rubrik = f"Rubrik {nr} {_stycke(slump, 4)}"
+        tidning = f"Tidning {nr % 37}"
+        datum = f"20{10 + nr % 15}-{nr % 12 + 1:02d}-{nr % 28 + 1:02d}"
+        poster.append((rubrik, tidning, datum, sida))
+        
+        text = [_stycke(slump, 12) for _ in range(slump.randint(10, 30))]
+        källa = [rubrik, f"{tidning} | Nyheter | {datum} | Sida: {nr % 40 + 1}", f"Anna Skribent{nr % 9}"]
+        copyright = "Alla artiklar är skyddade av upphovsrättslagen."
+        länk = f"https://ret.nu/{nr:08d}X"
+        if nr % 3 == 0:
+            # Artikeln fortsätter på nästa sida
+            artikelsidor.append((källa + text, länk))
+            artikelsidor.append(([_stycke(slump, 12) for _ in range(10)] + [copyright], None))
+            sida += 2
+        else:
+            artikelsidor.append((källa + text + [copyright], länk))
+            sida += 1
+    
+    sidor = []
+    for nr in range(toc_sidor):
+        rader = [
+            f"{rubrik} {PDF_AVSKILJARE} {tidning} {datum} {sida}"
+            for rubrik, tidning, datum, sida in poster[nr * TOC_PER_SIDA:(nr + 1) * TOC_PER_SIDA]
+        ]
+        sidor.append(_SIDHUVUD + rader)
+    
+    länkar = {}
+    for rader, länk in artikelsidor:
+        if länk:
+            länkar[len(sidor)] = [länk]
+        sidor.append(_SIDHUVUD + rader)
+    
+    märken = [(f"{r} {PDF_AVSKILJARE} {t} {d}", s - 1) for r, t, d, s in poster] if bokmärken else None
+    return _bygg_pdf(sidor, länkar, märken)
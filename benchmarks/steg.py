@@ -0,0 +1,179 @@
+"""
+Stegen som mäts. Varje steg är ett par (förbered, kör): förbered läser in
+det som steget behöver och räknas inte in i mätningen, kör gör arbetet och
+returnerar antalet artiklar (eller sidor) som behandlades.
+"""
+from io import BytesIO
+
+
+def _läs(sökväg):
+    with open(sökväg, "rb") as f:
+        return f.read()
+
+
+def _df(sökväg):
+    from retrieverparser import retrieverrens_fil
+    
+    with open(sökväg, "rb") as f:
+        return retrieverrens_fil(f)
+
+
+def _vektoriserad(data):
+    from retrieverparser import identifiera_kodning, retrieverrens
+    
+    return len(retrieverrens(data.decode(identifiera_kodning(data))))
+
+
+def _strömmande(sökväg):
+    return len(_df(sökväg))
+
+
+def _index(sökväg):
+    from retrieverparser import Artikelindex
+    
+    with Artikelindex.öppna(sökväg) as index:
+        return len(index.till_dataframe())
+
+
+def _poster(sökväg):
+    from retrieverparser import läs_artiklar
+    
+    return sum(1 for _ in läs_artiklar(sökväg))
+
+
+def _typning(df):
+    from retrieverparser import typa_kolumner
+    
+    return len(typa_kolumner(df))
+
+
+def _sökindex(df):
+    from retrieverparser import Sökindex
+    
+    return Sökindex.från_dataframe(df).antal_artiklar
+
+
+def _parquet(df):
+    from retrieverparser import parquet_byte
+    
+    parquet_byte(df)
+    return len(df)
+
+
+def _excel(df):
+    from retrieverparser import excel_byte
+    
+    excel_byte(df)
+    return len(df)
+
+
+def _pdf_toc(data):
+    from retrieverparser import extract_toc_from_pdf
+    
+    return len(extract_toc_from_pdf(BytesIO(data)))
+
+
+def _med_bokmärken(sökväg):
+    # Samma export, men med bokmärken, så att innehållsförteckningen läses ur dem
+    from retrieverparser import extract_toc_from_pdf
+    
+    from .korpus import pdfexport
+    
+    return pdfexport(len(extract_toc_from_pdf(sökväg)), bokmärken=True)
+
+
+def _pdf_länkar(data):
+    from retrieverparser import extract_hyperlinks_by_page
+    
+    return sum(len(länkar) for länkar in extract_hyperlinks_by_page(BytesIO(data)).values())
+
+
+def _pdf_hela(data):
+    from retrieverparser import parse_retriever_pdf
+    
+    return len(parse_retriever_pdf(BytesIO(data)))
+
+
+def _pdf_pdfium(data):
+    from retrieverparser import parse_retriever_pdf
+    
+    return len(parse_retriever_pdf(BytesIO(data), backend="pypdfium2"))
+
+
+def _pdf_parallell(data):
+    from retrieverparser import parse_retriever_pdf
+    
+    return len(parse_retriever_pdf(BytesIO(data), max_workers=None))
+
+
+def _ingenting(sökväg):
+    return sökväg
+
+
+# Steg för textexporter, i körordning
+TEXTSTEG = {
+    "text.vektoriserad": (_läs, _vektoriserad),
+    "text.strömmande": (_ingenting, _strömmande),
+    "text.index": (_ingenting, _index),
+    "text.poster": (_ingenting, _poster),
+    "text.typning": (_df, _typning),
+    "text.sökindex": (_df, _sökindex),
+    "export.parquet": (_df, _parquet),
+    "export.excel": (_df, _excel),
+}
+
+# Steg för PDF-exporter
+PDFSTEG = {
+    "pdf.toc": (_läs, _pdf_toc),
+    "pdf.bokmärken": (_med_bokmärken, _pdf_toc),
+    "pdf.länkar": (_läs, _pdf_länkar),
+    "pdf.hela": (_läs, _pdf_hela),
+    "pdf.pdfium": (_läs, _pdf_pdfium),
+    "pdf.parallell": (_läs, _pdf_parallell),
+}
+
+STEG = {**TEXTSTEG, **PDFSTEG}
+
+
+def _rss_mb():
+    # Nuvarande RSS; /proc finns bara på Linux
+    try:
+        import os
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except (OSError, ValueError, AttributeError):
+        return _topp_rss_mb()
+
+
+def _topp_rss_mb():
+    try:
+        import resource
+        import sys
+    except ImportError:
+        return None
+    topp = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss är i kB på Linux men i byte på macOS
+    return topp / 2**20 if sys.platform == "darwin" else topp / 2**10
+
+
+def mät(namn, sökväg):
+    """
+    Kör ett steg på en fil och returnerar tid, antal och minnesåtgång.
+    Körs i en egen process så att toppvärdet för RSS bara gäller steget.
+    """
+    import time
+    
+    förbered, kör = STEG[namn]
+    indata = förbered(sökväg)
+    rss_före = _rss_mb()
+    
+    start = time.perf_counter()
+    antal = kör(indata)
+    sekunder = time.perf_counter() - start
+    
+    return {
+        "sekunder": sekunder,
+        "antal": antal,
+        "rss_före_mb": rss_före,
+        "topp_rss_mb": _topp_rss_mb(),
+    }
@@ -1,253 +1,76 @@
 import streamlit as st
-import re
 import pandas as pd
-from io import BytesIO
 import pdfplumber
 from datetime import datetime
 import gc
 
-def extract_toc_from_pdf(pdf_file):
-    """Extract table of contents with article metadata"""
-    articles_toc = []
-    
-    with pdfplumber.open(pdf_file) as pdf:
-        toc_text = ""
-        toc_end_page = 4
-        
-        for page_num in range(min(30, len(pdf.pages))):
-            page_text = pdf.pages[page_num].extract_text()
-            
-            lines = page_text.split('\n')
-            toc_like_lines = sum(1 for line in lines 
-                                if re.search(r'\d{4}-\d{2}-\d{2}\s+\d{1,4}$', line.strip()))
-            
-            if toc_like_lines < 5 and page_num >= 4:
-                toc_end_page = page_num
-                break
-            
-            toc_text += page_text + "\n"
-            toc_end_page = page_num + 1
-        
-        lines = toc_text.split('\n')
-        
-        for line in lines:
-            line = line.strip()
-            
-            if not line or 'Kandidatuppsats' in line or 'Datum 2026' in line or 'Tidningsartiklar' in line:
-                continue
-            if line in ['heder, hedersrelaterat', 'Tidningar', 'Tidning', 'Heders', 'Allehanda', 'Socialdemokraten', 'Nyheter', 'Nyheter -']:
-                continue
-            
-            if '\ue618' in line:
-                parts = line.split('\ue618')
-                
-                if parts[0].strip() == '':
-                    continue
-                
-                if len(parts) >= 2:
-                    title = parts[0].strip()
-                    rest = parts[1].strip()
-                    
-                    match = re.search(r'^(.+?)\s+(\d{4}-\d{2}-\d{2})\s+(\d{1,3})$', rest)
-                    if match:
-                        source = match.group(1).strip()
-                        date = match.group(2)
-                        page_num = int(match.group(3))
-                        
-                        articles_toc.append({
-                            'title': title,
-                            'source': source,
-                            'date': date,
-                            'page': page_num
-                        })
-    
-    # Clear memory
-    del toc_text
-    gc.collect()
-    
-    return articles_toc
+from retrieverparser import (
+    DEFAULT_PDF_BACKEND, EXCEL_MIME, PDF_PARSER_VERSION, Korpuslager, Profil, csv_byte, excel_byte,
+    feather_byte, innehållsnyckel, parquet_byte, parse_retriever_pdf,
+)
 
 
-def extract_hyperlinks_by_page(pdf_file):
-    """Extract hyperlinks organized by page - memory optimized"""
-    links_by_page = {}
-    
-    with pdfplumber.open(pdf_file) as pdf:
-        for page_num, page in enumerate(pdf.pages):
-            links_by_page[page_num] = []
-            if page.annots:
-                for annot in page.annots:
-                    if annot.get('uri'):
-                        links_by_page[page_num].append(annot['uri'])
-    
-    return links_by_page
+@st.cache_resource
+def get_store():
+    """Parsed PDFs on disk, keyed by content hash"""
+    try:
+        return Korpuslager()
+    except OSError:
+        return None
 
 
-def process_single_article(pdf, toc_entry, toc_idx, articles_toc, links_by_page):
-    """Process a single article - memory optimized"""
-    page_num = toc_entry['page'] - 1
-    
-    if page_num >= len(pdf.pages):
-        return None
-    
-    page = pdf.pages[page_num]
-    page_text = page.extract_text()
-    
-    lines = page_text.split('\n')
-    lines = [line.strip() for line in lines if line.strip()]
-    
-    lines = [line for line in lines if 
-             'Tidningsartiklar - Kandidatuppsats' not in line and
-             not line.startswith('Datum 2026')]
-    
-    author = ""
-    article_text = []
-    
-    source_line_idx = None
-    for i, line in enumerate(lines):
-        if '|' in line and ('Sida:' in line or 'Sida ' in line):
-            source_line_idx = i
-            break
-    
-    if source_line_idx is not None:
-        if source_line_idx + 1 < len(lines):
-            potential_author = lines[source_line_idx + 1]
-            
-            words = potential_author.split()
-            if (len(words) >= 1 and len(words) <= 6 and
-                len(potential_author) < 100 and
-                not potential_author.endswith('.') and
-                'Optional[©' not in potential_author and
-                'Alla artiklar är skyddade' not in potential_author):
-                author = potential_author
-                text_start_idx = source_line_idx + 2
-            else:
-                text_start_idx = source_line_idx + 1
-        else:
-            text_start_idx = source_line_idx + 1
-        
-        for line in lines[text_start_idx:]:
-            if ('Optional[©' in line or 
-                'Alla artiklar är skyddade' in line or 
-                'Klicka här för att' in line):
-                break
-            article_text.append(line)
-    
-    next_article_page = None
-    if toc_idx + 1 < len(articles_toc):
-        next_article_page = articles_toc[toc_idx + 1]['page'] - 1
-    
-    current_page = page_num + 1
-    max_pages = 10
-    pages_read = 0
-    
-    while current_page < len(pdf.pages) and pages_read < max_pages:
-        if next_article_page and current_page >= next_article_page:
-            break
-        
-        page = pdf.pages[current_page]
-        page_text = page.extract_text()
-        
-        lines = page_text.split('\n')
-        lines = [line.strip() for line in lines if line.strip()]
-        
-        lines = [line for line in lines if 
-                 'Tidningsartiklar - Kandidatuppsats' not in line and
-                 not line.startswith('Datum 2026') and
-                 not line.startswith('Sida ') and
-                 line not in ['Retriever', 'Nyheter']]
-        
-        found_copyright = False
-        for line in lines:
-            if ('Optional[©' in line or 
-                'Alla artiklar är skyddade' in line or 
-                'Klicka här för att' in line):
-                found_copyright = True
-                break
-            article_text.append(line)
-        
-        if found_copyright:
-            break
-        
-        current_page += 1
-        pages_read += 1
-    
-    full_article_text = ' '.join(article_text).strip()
-    
-    # Limit text length to save memory
-    max_text_length = 10000  # Characters
-    if len(full_article_text) > max_text_length:
-        full_article_text = full_article_text[:max_text_length]
-    
-    url = ""
-    if page_num in links_by_page and len(links_by_page[page_num]) > 0:
-        url = links_by_page[page_num][0]
-    
-    article = {
-        'Title': toc_entry['title'],
-        'Source': toc_entry['source'],
-        'Date': toc_entry['date'],
-        'Page': str(toc_entry['page']),
-        'Author': author,
-        'URL': url,
-        'Article_Text': full_article_text[:1000] if len(full_article_text) > 1000 else full_article_text,
-        'Full_Text': full_article_text,
-        'Has_Text': len(full_article_text) > 0,
-        'Text_Length': len(full_article_text),
-        'Word_Count': len(full_article_text.split()) if full_article_text else 0
-    }
-    
-    # Clear variables
-    del page_text, lines, article_text, full_article_text
-    
-    return article
+EXPORT_COLUMNS = ['Title', 'Source', 'Date', 'Page', 'Author', 'URL', 'Word_Count']
 
 
-def parse_retriever_pdf(pdf_file, progress_callback=None):
-    """Parse Retriever PDF using TOC - memory optimized with progress tracking"""
-    
-    # Extract TOC
-    articles_toc = extract_toc_from_pdf(pdf_file)
-    total_articles = len(articles_toc)
-    
-    if progress_callback:
-        progress_callback(0.1, f"Found {total_articles} articles in TOC")
-    
-    # Extract hyperlinks
-    links_by_page = extract_hyperlinks_by_page(pdf_file)
-    
-    if progress_callback:
-        progress_callback(0.2, "Extracted hyperlinks")
-    
-    articles = []
-    
-    with pdfplumber.open(pdf_file) as pdf:
-        for toc_idx, toc_entry in enumerate(articles_toc):
-            article = process_single_article(pdf, toc_entry, toc_idx, articles_toc, links_by_page)
-            
-            if article:
-                articles.append(article)
-            
-            # Update progress
-            if progress_callback and toc_idx % 5 == 0:
-                progress = 0.2 + (0.7 * (toc_idx + 1) / total_articles)
-                progress_callback(progress, f"Processing article {toc_idx + 1} of {total_articles}")
-            
-            # Clear memory every 10 articles
-            if toc_idx % 10 == 0:
-                gc.collect()
-    
-    if progress_callback:
-        progress_callback(0.9, "Finalizing...")
-    
-    # Final cleanup
-    del articles_toc, links_by_page
-    gc.collect()
-    
-    if progress_callback:
-        progress_callback(1.0, "Complete!")
-    
-    return articles
+@st.cache_data(max_entries=4, show_spinner=False)
+def export_csv(key, text_column, _df):
+    """CSV for download, built on first click and reused for the same PDF"""
+    return csv_byte(_df[EXPORT_COLUMNS + [text_column]], kodning='utf-8-sig')
+
+
+@st.cache_data(max_entries=4, show_spinner=False)
+def export_excel(key, _df):
+    """Excel for download, written row by row in write-only mode"""
+    return excel_byte(_df[EXPORT_COLUMNS + ['Full_Text']], bladnamn='Articles')
+
+
+@st.cache_data(max_entries=4, show_spinner=False)
+def export_parquet(key, _df):
+    """All article fields as zstd-compressed Parquet"""
+    return parquet_byte(_df)
+
+
+@st.cache_data(max_entries=4, show_spinner=False)
+def export_feather(key, _df):
+    """All article fields as uncompressed Arrow IPC, ready to memory-map"""
+    return feather_byte(_df)
+
+
+def show_profile(profile):
+    """Time, throughput and memory peak per parsing stage in the sidebar"""
+    rows = [
+        {
+            "stage": m.namn,
+            "seconds": m.sekunder,
+            "count": m.antal,
+            "per second": m.antal / m.sekunder if m.antal and m.sekunder else None,
+            "peak MB": m.topp_byte / 2**20 if m.topp_byte is not None else None,
+            "share %": 100 * m.sekunder / profile.sekunder if profile.sekunder else None,
+        }
+        for m in profile
+    ]
+    with st.sidebar.expander("⏱️ Time per stage", expanded=True):
+        st.dataframe(
+            pd.DataFrame(rows),
+            hide_index=True,
+            column_config={
+                "seconds": st.column_config.NumberColumn(format="%.3f"),
+                "per second": st.column_config.NumberColumn(format="%.0f"),
+                "peak MB": st.column_config.NumberColumn(format="%.1f"),
+                "share %": st.column_config.NumberColumn(format="%.0f"),
+            }
+        )
+        st.caption(f"Total {profile.sekunder:.2f} s")
 
 
 def main():
@@ -260,6 +83,23 @@ def main():
     with st.sidebar:
         st.header("⚙️ Performance")
         st.info("Memory optimized for Streamlit Cloud")
+        fast_extraction = st.checkbox(
+            "⚡ Fast text extraction (pypdfium2)",
+            value=False,
+            help="Reads page text without pdfplumber's layout analysis - many times faster. "
+                 "Turn off to use pdfplumber, the reference, if the result looks wrong."
+        )
+        backend = "pypdfium2" if fast_extraction else DEFAULT_PDF_BACKEND
+        profiling = st.checkbox(
+            "Measure time per stage",
+            value=False,
+            help="Shows time and throughput for TOC reading and article text"
+        )
+        profile_memory = profiling and st.checkbox(
+            "Also measure memory",
+            value=False,
+            help="Shows the peak memory per stage; makes parsing several times slower"
+        )
     
     uploaded_file = st.file_uploader("Choose a PDF file", type=['pdf'])
     
@@ -291,20 +131,41 @@ def main():
                 progress_bar.progress(progress)
                 status_text.text(message)
             
+            profile = Profil(minne=profile_memory)
             try:
-                # Reset file pointer
-                uploaded_file.seek(0)
+                # Reuse a stored result if this exact PDF was parsed before
+                store = get_store()
+                with profile.steg("cache lookup"):
+                    key = innehållsnyckel(uploaded_file.getvalue(), "pdf", PDF_PARSER_VERSION, backend)
+                    df = store.hämta(key) if store is not None else None
+                
+                if df is None:
+                    # Reset file pointer
+                    uploaded_file.seek(0)
+                    
+                    # Parse with progress tracking
+                    articles = parse_retriever_pdf(
+                        uploaded_file, progress_callback=update_progress, profil=profile, backend=backend
+                    )
+                    if articles:
+                        with profile.steg("DataFrame", len(articles)):
+                            df = pd.DataFrame(articles)
+                        if store is not None:
+                            with profile.steg("cache write"):
+                                store.spara(key, df)
+                    del articles
+                else:
+                    st.info("⚡ Loaded previously parsed result from cache")
                 
-                # Parse with progress tracking
-                articles = parse_retriever_pdf(uploaded_file, progress_callback=update_progress)
+                profile.stäng()
+                if profiling:
+                    show_profile(profile)
                 
                 # Clear progress indicators
                 progress_bar.empty()
                 status_text.empty()
                 
-                if articles:
-                    df = pd.DataFrame(articles)
-                    
+                if df is not None:
                     st.subheader("📊 Extraction Results")
                     col1, col2, col3, col4 = st.columns(4)
                     with col1:
@@ -358,36 +219,56 @@ def main():
                     
                     col1, col2, col3 = st.columns(3)
                     
+                    # Exports are built only when a button is clicked, and cached per PDF.
+                    # The callables run after this script has finished, so they bind
+                    # the frame and key as defaults instead of closing over them.
+                    stamp = datetime.now().strftime('%Y%m%d_%H%M')
+                    
                     with col1:
-                        csv_preview = df[['Title', 'Source', 'Date', 'Page', 'Author', 'URL', 'Word_Count', 'Article_Text']].to_csv(index=False, encoding='utf-8-sig')
                         st.download_button(
                             label="📥 CSV (Preview)",
-                            data=csv_preview.encode('utf-8-sig'),
-                            file_name=f"retriever_articles_preview_{datetime.now().strftime('%Y%m%d_%H%M')}.csv",
-                            mime="text/csv"
+                            data=lambda key=key, df=df: export_csv(key, 'Article_Text', df),
+                            file_name=f"retriever_articles_preview_{stamp}.csv",
+                            mime="text/csv",
+                            on_click="ignore"
                         )
                     
                     with col2:
-                        csv_full = df[['Title', 'Source', 'Date', 'Page', 'Author', 'URL', 'Word_Count', 'Full_Text']].to_csv(index=False, encoding='utf-8-sig')
                         st.download_button(
                             label="📥 CSV (Full Text)",
-                            data=csv_full.encode('utf-8-sig'),
-                            file_name=f"retriever_articles_full_{datetime.now().strftime('%Y%m%d_%H%M')}.csv",
-                            mime="text/csv"
+                            data=lambda key=key, df=df: export_csv(key, 'Full_Text', df),
+                            file_name=f"retriever_articles_full_{stamp}.csv",
+                            mime="text/csv",
+                            on_click="ignore"
                         )
                     
                     with col3:
-                        excel_buffer = BytesIO()
-                        with pd.ExcelWriter(excel_buffer, engine='openpyxl') as writer:
-                            df[['Title', 'Source', 'Date', 'Page', 'Author', 'URL', 'Word_Count', 'Full_Text']].to_excel(
-                                writer, sheet_name='Articles', index=False
-                            )
-                        
                         st.download_button(
                             label="📥 Excel File",
-                            data=excel_buffer.getvalue(),
-                            file_name=f"retriever_articles_{datetime.now().strftime('%Y%m%d_%H%M')}.xlsx",
-                            mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+                            data=lambda key=key, df=df: export_excel(key, df),
+                            file_name=f"retriever_articles_{stamp}.xlsx",
+                            mime=EXCEL_MIME,
+                            on_click="ignore"
+                        )
+                    
+                    col1, col2, col3 = st.columns(3)
+                    
+                    with col1:
+                        st.download_button(
+                            label="📥 Parquet",
+                            data=lambda key=key, df=df: export_parquet(key, df),
+                            file_name=f"retriever_articles_{stamp}.parquet",
+                            mime="application/vnd.apache.parquet",
+                            on_click="ignore"
+                        )
+                    
+                    with col2:
+                        st.download_button(
+                            label="📥 Feather (Arrow IPC)",
+                            data=lambda key=key, df=df: export_feather(key, df),
+                            file_name=f"retriever_articles_{stamp}.feather",
+                            mime="application/vnd.apache.arrow.file",
+                            on_click="ignore"
                         )
                     
                     # Charts with error handling
@@ -416,10 +297,6 @@ def main():
                     except Exception as e:
                         st.warning(f"Could not generate word count chart: {str(e)}")
                     
-                    # Final cleanup
-                    del df
-                    gc.collect()
-                    
                 else:
                     st.warning("⚠️ No articles were extracted from the PDF.")
                     st.info("This might happen if the PDF structure is different from expected. Check the raw preview above.")
@@ -431,6 +308,8 @@ def main():
                 st.exception(e)
                 st.info("💡 Tip: Check the raw PDF preview above to see if the text is extractable.")
                 st.info("💡 If the file is very large, try processing a smaller PDF first.")
+            finally:
+                profile.stäng()
     
     with st.sidebar:
         st.header("📖 Instructions")
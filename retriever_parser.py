@@ -1,307 +1,455 @@
 import streamlit as st
 import pandas as pd
-import re
-from io import StringIO, BytesIO
-
-def retrieverrens(text):
-    """
-    Funktion som rensar retriever-nedladdningar (formatet ska vara utf-16)
-    """
-    # KRITISKT: Normalisera radbrytningar först!
-    # Retriever-filer använder Windows-format (CRLF) som måste konverteras
-    text = text.replace('\r\n', '\n').replace('\r', '\n')
-    
-    # Rensa bort metadata
-    text = re.sub(r"Linnéuniversitetet.+", "", text)
-    text = re.sub(r"Datum\s.+", "", text)
-    text = re.sub(r"Nyheter:", "", text)
-    text = text.strip("\n")
-    
-    # Ta bort från originaltexten det som senare blir markör mellan artiklar
-    text = re.sub(r"\|", "", text)
-    
-    # Samla ihop alla länkar till originalartiklar
-    länkar = re.findall(r"http://ret\.nu/\w+", text)
-    
-    # Bryt texten i artiklar
-    # Mönster som fungerar för modernt Retriever-format (med "Alla artiklar" prefix)
-    text = re.sub(r"Alla artiklar.*?Läs hela artikeln på\s+http://ret\.nu/\w+\s*\n=+\s*\n+", "|", text, flags=re.DOTALL)
-    
-    # Alternativt mönster för Se webartikeln
-    text = re.sub(r"Se webartikeln på\s+http://ret\.nu/\w+\s*\n=+\s*\n+", "|", text, flags=re.DOTALL)
-    
-    # Äldre mönster (för bakåtkompatibilitet med andra format)
-    text = re.sub(r"©.+\n\nLäs hela.+\n=+\n\n", "|", text)
-    text = re.sub(r"©.+\n\nSe webartikeln på.+\n=+\n\n", "|", text)
+
+from retrieverparser import (
+    EXCEL_MIME, Korpuslager, Parsecache, Profil, Sökindex, csv_byte, excel_byte, feather_byte,
+    innehållsnyckel, parquet_byte, parsa_filer_cachat, sammanfoga,
+)
+
+# Preview table: rows per page to choose from, and characters of text shown per row
+PAGE_SIZES = [25, 50, 100, 250]
+PREVIEW_CHARS = 200
+
+# Shown when no file has been uploaded yet
+EXAMPLE_EXPORT = """
+Linnéuniversitetet BIBSAM (Växjö Universitet Kalmar Högskola)
+Uttag 2020-01-28
+
+Nyheter:
+
+... och här är ytterligare 50 förebilder att inspireras av
+Nya Dagen, 2006-12-29
+Sida 10#11
+Publicerat i print.
+
+[Artikeltext här...]
+
+Alla artiklar är skyddade av upphovsrättslagen...
+Läs hela artikeln på
+http://ret.nu/nS45H0r6
+==============================================================================
+
+[Nästa artikel...]
+        """
+
+
+@st.cache_resource
+def get_parse_cache():
+    # Shared by all sessions: parsed files keyed by content hash and parser version
+    return Parsecache(max_antal=64)
+
+
+@st.cache_resource
+def get_store():
+    # Parsed files on disk, so known exports load instantly after a restart
+    try:
+        return Korpuslager()
+    except OSError:
+        return None
+
+
+@st.cache_resource(max_entries=8)
+def merge_results(files, dedupe, typed, _results):
+    # The merged frame is reused as long as the same files are uploaded
+    return sammanfoga(_results, deduplicera=dedupe, typad=typed)
+
+
+@st.cache_resource(max_entries=8)
+def get_search_index(files, dedupe, _df):
+    # Built once per parsed dataset; searches then only look up the index
+    return Sökindex.från_dataframe(_df)
+
+
+@st.cache_data(max_entries=4, show_spinner=False)
+def export_csv(key, _df):
+    # Built on first download and reused until the data or filter changes
+    return csv_byte(_df)
+
+
+@st.cache_data(max_entries=4, show_spinner=False)
+def export_excel(key, _df):
+    return excel_byte(_df)
+
+
+@st.cache_data(max_entries=4, show_spinner=False)
+def export_parquet(key, _df):
+    # Keeps the column types, for loading into pandas, R or Spark
+    return parquet_byte(_df)
+
+
+@st.cache_data(max_entries=4, show_spinner=False)
+def export_feather(key, _df):
+    return feather_byte(_df)
+
+
+def snippet(texts, length=PREVIEW_CHARS):
+    # Shortened article texts for the preview table
+    short = texts.str.slice(0, length)
+    return short.mask((texts.str.len() > length).fillna(False), short + "…")
+
+
+# Streamlit app
+def show_profile(profile, note=None):
+    # Time, throughput and memory peak per stage, as a collapsible sidebar table
+    rows = [
+        {
+            "steg": m.namn,
+            "sekunder": m.sekunder,
+            "antal": m.antal,
+            "per sekund": m.antal / m.sekunder if m.antal and m.sekunder else None,
+            "minnestopp MB": m.topp_byte / 2**20 if m.topp_byte is not None else None,
+            "andel %": 100 * m.sekunder / profile.sekunder if profile.sekunder else None,
+        }
+        for m in profile
+    ]
+    with st.sidebar.expander("⏱️ Prestanda per steg", expanded=True):
+        if note:
+            st.caption(note)
+        if rows:
+            st.dataframe(
+                pd.DataFrame(rows),
+                hide_index=True,
+                column_config={
+                    "sekunder": st.column_config.NumberColumn(format="%.3f"),
+                    "per sekund": st.column_config.NumberColumn(format="%.0f"),
+                    "minnestopp MB": st.column_config.NumberColumn(format="%.1f"),
+                    "andel %": st.column_config.NumberColumn(format="%.0f"),
+                }
+            )
+            st.caption(f"Totalt {profile.sekunder:.2f} s")
+
+
+def main():
+    st.set_page_config(page_title="Retriever Parser", page_icon="📰", layout="wide")
     
-    textlista = text.split("|")
-    tuplelist = []
+    st.title("📰 Retriever Text Parser")
+    st.markdown("Ladda upp textfiler från Retriever-databasen för att extrahera och organisera artikeldata.")
     
-    for item in textlista:
-        # Extrahera tidningstitel och datum
-        datum = re.findall(r"\n.+,\s\d+-\d+-\d+", item)
-        sidor = re.findall(r"Sida\s\d.+", item)
+    # Sidebar with instructions
+    with st.sidebar:
+        st.header("Instruktioner")
+        st.markdown("""
+        **Så här använder du appen:**
         
-        if len(sidor) > 0:
-            sidor = sidor[0]
-            item = re.sub(sidor, "", item)
-        else:
-            sidor = ""
+        1. Ladda upp en eller flera `.txt` filer från Retriever
+        2. Filerna måste vara i UTF-16 format
+        3. Förhandsgranska resultatet
+        4. Ladda ner som CSV, Excel, Parquet eller Feather
         
-        rentextrader = item.split("\n")
-        rubrik = rentextrader[0]
-        rentext = " ".join(rentextrader[3:])
-        rentext = rentext.replace("Publicerat i print.", "")
+        **Kolumner i output:**
+        - Rubrik
+        - Tidning
+        - Datum
+        - Sida
+        - Text
+        - Länk
+        - Källfil (source_file)
+        """)
         
-        if len(datum) == 0:
-            tuplen = (rubrik, "NA", sidor.strip("Sida "), rentext)
-        else:
-            tuplen = (rubrik, datum[0].strip(), sidor.strip("Sida "), rentext)
+        index_mode = st.checkbox(
+            "Indexeringsläge för stora filer",
+            value=False,
+            help="Indexerar artiklarna direkt i filens byte i stället för att avkoda hela filen till text"
+        )
         
-        tuplelist.append(tuplen)
-    
-    artikeldict = []
-    länknr = 0
-    
-    for i in tuplelist:
-        tiddat = i[1].split(",")
-        if len(tiddat) > 2:
-            tiddat = [tiddat[0] + tiddat[1], tiddat[2]]
+        dedupe = st.checkbox(
+            "Ta bort dubbletter",
+            value=True,
+            help="Samma artikel (samma ret.nu-länk, eller samma rubrik, tidning och datum) behålls bara en gång"
+        )
         
-        if länknr < len(länkar):
-            länk = länkar[länknr]
-        else:
-            länk = ""
+        typed = st.checkbox(
+            "Kompakta kolumntyper",
+            value=True,
+            help="Tidning som kategori, datum som riktiga datum och sida som heltal - mindre minne och snabbare filtrering"
+        )
         
-        artikel = {
-            "rubrik": i[0],
-            "tidning": tiddat[0] if len(tiddat) > 0 else "",
-            "datum": tiddat[1] if len(tiddat) > 1 else "",
-            "sida": i[2],
-            "text": i[3],
-            "länk": länk
-        }
-        artikeldict.append(artikel)
-        länknr = länknr + 1
-    
-    artikelpd = pd.DataFrame(artikeldict)
-    return artikelpd
-
-# Streamlit app
-st.set_page_config(page_title="Retriever Parser", page_icon="📰", layout="wide")
-
-st.title("📰 Retriever Text Parser")
-st.markdown("Ladda upp textfiler från Retriever-databasen för att extrahera och organisera artikeldata.")
-
-# Sidebar with instructions
-with st.sidebar:
-    st.header("Instruktioner")
-    st.markdown("""
-    **Så här använder du appen:**
-    
-    1. Ladda upp en eller flera `.txt` filer från Retriever
-    2. Filerna måste vara i UTF-16 format
-    3. Förhandsgranska resultatet
-    4. Ladda ner som CSV
+        paged_preview = st.checkbox(
+            "Sidvis förhandsgranskning",
+            value=True,
+            help="Visar en sida i taget med förkortade texter; markera en rad för att läsa hela artikeln"
+        )
+        
+        profiling = st.checkbox(
+            "Mät prestanda per steg",
+            value=False,
+            help="Visar tid och antal artiklar per sekund för varje steg i inläsningen"
+        )
+        profile_memory = profiling and st.checkbox(
+            "Mät även minnesanvändning",
+            value=False,
+            help="Visar minnestoppen per steg; gör inläsningen flera gånger långsammare"
+        )
     
-    **Kolumner i output:**
-    - Rubrik
-    - Tidning
-    - Datum
-    - Sida
-    - Text
-    - Länk
-    """)
-
-# File uploader
-uploaded_files = st.file_uploader(
-    "Välj Retriever textfiler (.txt)",
-    type=['txt'],
-    accept_multiple_files=True,
-    help="Du kan ladda upp flera filer samtidigt"
-)
-
-if uploaded_files:
-    # Combine all uploaded files
-    combined_text = ""
+    # File uploader
+    uploaded_files = st.file_uploader(
+        "Välj Retriever textfiler (.txt)",
+        type=['txt'],
+        accept_multiple_files=True,
+        help="Du kan ladda upp flera filer samtidigt"
+    )
     
-    with st.spinner("Läser in filer..."):
+    if uploaded_files:
+        # Read all uploaded files; each one is decoded and parsed on its own
+        files = []
+        keys = []
+        file_keys = st.session_state.setdefault("file_keys", {})
         for uploaded_file in uploaded_files:
             try:
-                # Reset file pointer to beginning
-                uploaded_file.seek(0)
-                
-                # Read as bytes first
-                bytes_data = uploaded_file.read()
-                
-                # Try UTF-16 decoding
-                try:
-                    text = bytes_data.decode('utf-16')
-                    combined_text = combined_text + " " + text
-                    st.success(f"✓ Läste in: {uploaded_file.name} ({len(text):,} tecken)")
-                except UnicodeDecodeError:
-                    # Try UTF-8 as fallback
-                    try:
-                        text = bytes_data.decode('utf-8')
-                        combined_text = combined_text + " " + text
-                        st.warning(f"⚠️ Läste {uploaded_file.name} som UTF-8 (förväntat UTF-16)")
-                    except UnicodeDecodeError:
-                        st.error(f"✗ Kunde inte läsa {uploaded_file.name} - felaktigt format")
-                        
+                data = uploaded_file.getvalue()
+                # Hash each upload once, not on every rerun
+                cache_id = (uploaded_file.file_id, index_mode, dedupe)
+                if cache_id not in file_keys:
+                    file_keys[cache_id] = innehållsnyckel(data, index_mode, dedupe)
+                files.append((uploaded_file.name, data))
+                keys.append(file_keys[cache_id])
             except Exception as e:
                 st.error(f"✗ Kunde inte läsa {uploaded_file.name}: {str(e)}")
-    
-    if combined_text:
-        # Parse the text
-        with st.spinner("Bearbetar text..."):
-            try:
-                df = retrieverrens(combined_text)
-                
-                st.success(f"✓ Hittade {len(df)} artiklar!")
-                
-                # Display statistics
-                col1, col2, col3 = st.columns(3)
-                with col1:
-                    st.metric("Antal artiklar", len(df))
-                with col2:
-                    st.metric("Antal tidningar", df['tidning'].nunique())
-                with col3:
-                    if len(df) > 0 and df['datum'].notna().any():
-                        date_range = f"{df['datum'].min()} → {df['datum'].max()}"
-                    else:
-                        date_range = "N/A"
-                    st.metric("Datumspann", date_range)
-                
-                # Display preview
-                st.subheader("Förhandsgranskning")
-                
-                # Filter options
-                with st.expander("🔍 Filter och sökning"):
-                    col1, col2 = st.columns(2)
+        
+        # Parse new files in parallel, one process per file; known files come from the cache
+        profile = Profil(minne=profile_memory)
+        with st.spinner("Läser in filer..."):
+            results = parsa_filer_cachat(
+                files, get_parse_cache(), indexera=index_mode, nycklar=keys, lager=get_store(),
+                deduplicera=dedupe, profil=profile if profiling else None
+            )
+        all_cached = len(profile) == 0
+        
+        for result in results:
+            if result.fel:
+                st.error(f"✗ Kunde inte läsa {result.namn} - felaktigt format ({result.fel})")
+                continue
+            details = f"format **{result.df.attrs['format']}**, {len(result.df):,} artiklar"
+            if result.kodning.startswith('utf-8'):
+                st.warning(f"⚠️ Läste {result.namn} som UTF-8 (förväntat UTF-16) - {details}")
+            else:
+                st.success(f"✓ Läste in: {result.namn} ({details})")
+        
+        if any(result.df is not None for result in results):
+            with st.spinner("Bearbetar text..."):
+                try:
+                    dataset_key = tuple(zip(keys, (name for name, _ in files)))
+                    with profile.steg("sammanfogning"):
+                        df = merge_results(dataset_key, dedupe, typed, results)
+                    
+                    st.success(f"✓ Hittade {len(df)} artiklar!")
+                    if df.attrs.get("dubbletter"):
+                        st.info(f"🧹 Tog bort {df.attrs['dubbletter']:,} dubbletter")
+                    
+                    # Display statistics
+                    col1, col2, col3 = st.columns(3)
                     with col1:
-                        search_term = st.text_input("Sök i rubriker eller text", "")
+                        st.metric("Antal artiklar", len(df))
                     with col2:
-                        selected_tidning = st.multiselect(
-                            "Filtrera på tidning",
-                            options=sorted(df['tidning'].unique())
+                        st.metric("Antal tidningar", df['tidning'].nunique())
+                    with col3:
+                        if len(df) > 0 and df['datum'].notna().any():
+                            first_date, last_date = df['datum'].min(), df['datum'].max()
+                            if pd.api.types.is_datetime64_any_dtype(df['datum']):
+                                first_date, last_date = f"{first_date:%Y-%m-%d}", f"{last_date:%Y-%m-%d}"
+                            date_range = f"{first_date} → {last_date}"
+                        else:
+                            date_range = "N/A"
+                        st.metric("Datumspann", date_range)
+                    
+                    # Display preview
+                    st.subheader("Förhandsgranskning")
+                    
+                    # Filter options
+                    with st.expander("🔍 Filter och sökning"):
+                        col1, col2 = st.columns(2)
+                        with col1:
+                            search_term = st.text_input(
+                                "Sök i rubriker eller text",
+                                "",
+                                help='Flera ord måste alla finnas, OR/ELLER ger träff på något av dem '
+                                     'och "citattecken" söker efter exakt fras. Ett ord hittas även inuti '
+                                     'längre ord, t.ex. klimat i världsklimatet.'
+                            )
+                        with col2:
+                            selected_tidning = st.multiselect(
+                                "Filtrera på tidning",
+                                options=sorted(df['tidning'].unique())
+                            )
+                    
+                    # Apply filters
+                    filtered_df = df
+                    if search_term:
+                        with profile.steg("sökning", len(df)):
+                            search_index = get_search_index(dataset_key, dedupe, df)
+                            filtered_df = filtered_df[search_index.mask(search_term)]
+                    
+                    if selected_tidning:
+                        filtered_df = filtered_df[filtered_df['tidning'].isin(selected_tidning)]
+                    
+                    if profiling:
+                        show_profile(
+                            profile,
+                            note="Alla filer kom från cachen, så inläsningen mättes inte." if all_cached else None
                         )
-                
-                # Apply filters
-                filtered_df = df.copy()
-                if search_term:
-                    mask = (
-                        filtered_df['rubrik'].str.contains(search_term, case=False, na=False) |
-                        filtered_df['text'].str.contains(search_term, case=False, na=False)
-                    )
-                    filtered_df = filtered_df[mask]
-                
-                if selected_tidning:
-                    filtered_df = filtered_df[filtered_df['tidning'].isin(selected_tidning)]
-                
-                st.info(f"Visar {len(filtered_df)} av {len(df)} artiklar")
-                
-                # Display dataframe
-                st.dataframe(
-                    filtered_df,
-                    use_container_width=True,
-                    height=400,
-                    column_config={
+                    
+                    st.info(f"Visar {len(filtered_df)} av {len(df)} artiklar")
+                    
+                    # Display dataframe
+                    column_config = {
                         "länk": st.column_config.LinkColumn("Länk"),
+                        "datum": st.column_config.DateColumn("Datum", format="YYYY-MM-DD"),
                         "text": st.column_config.TextColumn(
                             "Text",
                             width="large",
                         ),
                     }
-                )
-                
-                # Download section
-                st.subheader("Ladda ner")
-                
-                col1, col2, col3 = st.columns(3)
-                
-                with col1:
-                    # Download full dataset as CSV
-                    csv = df.to_csv(index=False).encode('utf-8')
-                    st.download_button(
-                        label="📥 Ladda ner CSV",
-                        data=csv,
-                        file_name="retriever_export.csv",
-                        mime="text/csv",
-                    )
-                
-                with col2:
-                    # Download full dataset as Excel
-                    excel_buffer = BytesIO()
-                    with pd.ExcelWriter(excel_buffer, engine='openpyxl') as writer:
-                        df.to_excel(writer, index=False, sheet_name='Artiklar')
-                    excel_data = excel_buffer.getvalue()
-                    st.download_button(
-                        label="📥 Ladda ner Excel",
-                        data=excel_data,
-                        file_name="retriever_export.xlsx",
-                        mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-                    )
-                
-                with col3:
-                    # Download filtered dataset
-                    if len(filtered_df) < len(df):
-                        st.markdown("**Filtrerad data:**")
+                    
+                    if paged_preview:
+                        # Only the visible page is sent to the browser, with shortened texts
+                        col1, col2 = st.columns([1, 3])
+                        with col1:
+                            page_size = st.selectbox("Rader per sida", PAGE_SIZES, index=1)
+                        page_count = max(1, -(-len(filtered_df) // page_size))
+                        
+                        # Start over on the first page when the filter changes
+                        view = (dataset_key, search_term, tuple(selected_tidning), page_size)
+                        if st.session_state.get("preview_view") != view:
+                            st.session_state["preview_view"] = view
+                            st.session_state["preview_page"] = 1
+                        with col2:
+                            page = st.number_input(
+                                f"Sida (av {page_count:,})",
+                                min_value=1,
+                                max_value=page_count,
+                                key="preview_page"
+                            )
+                        
+                        start = (page - 1) * page_size
+                        page_df = filtered_df.iloc[start:start + page_size]
+                        # Streamlit keeps a selection per widget key, not per data, so each
+                        # page and filter gets its own key and starts without a selection
+                        event = st.dataframe(
+                            page_df.assign(text=snippet(page_df['text'])),
+                            width="stretch",
+                            height=400,
+                            column_config=column_config,
+                            on_select="rerun",
+                            selection_mode="single-row",
+                            key=f"preview_table_{hash((view, page))}"
+                        )
                         
-                        # CSV
-                        filtered_csv = filtered_df.to_csv(index=False).encode('utf-8')
+                        # The full text is only sent for the article being read
+                        rows = [row for row in event.selection.rows if row < len(page_df)]
+                        if rows:
+                            article = page_df.iloc[rows[0]]
+                            date = article['datum']
+                            if isinstance(date, pd.Timestamp):
+                                date = f"{date:%Y-%m-%d}"
+                            st.markdown(f"#### {article['rubrik']}")
+                            st.caption(f"{article['tidning']} · {date} · sida {article['sida']}")
+                            st.write(article['text'])
+                        else:
+                            st.caption("Markera en rad för att läsa hela artikeln.")
+                    else:
+                        st.dataframe(
+                            filtered_df,
+                            width="stretch",
+                            height=400,
+                            column_config=column_config
+                        )
+                    
+                    # Download section
+                    st.subheader("Ladda ner")
+                    
+                    col1, col2, col3 = st.columns(3)
+                    
+                    with col1:
+                        # Download full dataset as CSV, built only when clicked
                         st.download_button(
-                            label="📥 CSV (filtrerad)",
-                            data=filtered_csv,
-                            file_name="retriever_filtered.csv",
+                            label="📥 Ladda ner CSV",
+                            data=lambda: export_csv((dataset_key, dedupe, typed), df),
+                            file_name="retriever_export.csv",
                             mime="text/csv",
-                            key="filtered_csv"
                         )
-                        
-                        # Excel
-                        filtered_excel_buffer = BytesIO()
-                        with pd.ExcelWriter(filtered_excel_buffer, engine='openpyxl') as writer:
-                            filtered_df.to_excel(writer, index=False, sheet_name='Artiklar')
-                        filtered_excel_data = filtered_excel_buffer.getvalue()
                         st.download_button(
-                            label="📥 Excel (filtrerad)",
-                            data=filtered_excel_data,
-                            file_name="retriever_filtered.xlsx",
-                            mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-                            key="filtered_excel"
+                            label="📥 Ladda ner Parquet",
+                            data=lambda: export_parquet((dataset_key, dedupe, typed), df),
+                            file_name="retriever_export.parquet",
+                            mime="application/vnd.apache.parquet",
                         )
+                    
+                    with col2:
+                        # Download full dataset as Excel, built only when clicked
+                        st.download_button(
+                            label="📥 Ladda ner Excel",
+                            data=lambda: export_excel((dataset_key, dedupe, typed), df),
+                            file_name="retriever_export.xlsx",
+                            mime=EXCEL_MIME,
+                        )
+                        st.download_button(
+                            label="📥 Ladda ner Feather",
+                            data=lambda: export_feather((dataset_key, dedupe, typed), df),
+                            file_name="retriever_export.feather",
+                            mime="application/vnd.apache.arrow.file",
+                        )
+                    
+                    with col3:
+                        # Download filtered dataset
+                        if len(filtered_df) < len(df):
+                            st.markdown("**Filtrerad data:**")
+                            filter_key = (dataset_key, dedupe, typed, search_term, tuple(selected_tidning))
+                            
+                            # CSV
+                            st.download_button(
+                                label="📥 CSV (filtrerad)",
+                                data=lambda: export_csv(filter_key, filtered_df),
+                                file_name="retriever_filtered.csv",
+                                mime="text/csv",
+                                key="filtered_csv"
+                            )
+                            
+                            # Excel
+                            st.download_button(
+                                label="📥 Excel (filtrerad)",
+                                data=lambda: export_excel(filter_key, filtered_df),
+                                file_name="retriever_filtered.xlsx",
+                                mime=EXCEL_MIME,
+                                key="filtered_excel"
+                            )
+                            
+                            # Parquet
+                            st.download_button(
+                                label="📥 Parquet (filtrerad)",
+                                data=lambda: export_parquet(filter_key, filtered_df),
+                                file_name="retriever_filtered.parquet",
+                                mime="application/vnd.apache.parquet",
+                                key="filtered_parquet"
+                            )
+                            
+                            # Feather
+                            st.download_button(
+                                label="📥 Feather (filtrerad)",
+                                data=lambda: export_feather(filter_key, filtered_df),
+                                file_name="retriever_filtered.feather",
+                                mime="application/vnd.apache.arrow.file",
+                                key="filtered_feather"
+                            )
                 
-            except Exception as e:
-                st.error(f"Ett fel uppstod vid bearbetning: {str(e)}")
-                st.exception(e)
-else:
-    st.info("👆 Ladda upp en eller flera Retriever textfiler för att komma igång")
+                except Exception as e:
+                    st.error(f"Ett fel uppstod vid bearbetning: {str(e)}")
+                    st.exception(e)
+                finally:
+                    profile.stäng()
+    else:
+        st.info("👆 Ladda upp en eller flera Retriever textfiler för att komma igång")
+        
+        # Show example
+        with st.expander("📖 Visa exempel på förväntad filstruktur"):
+            st.code(EXAMPLE_EXPORT)
     
-    # Show example
-    with st.expander("📖 Visa exempel på förväntad filstruktur"):
-        st.code("""
-Linnéuniversitetet BIBSAM (Växjö Universitet Kalmar Högskola)
-Uttag 2020-01-28
-
-Nyheter:
+    # Footer
+    st.markdown("---")
+    st.markdown(
+        "Skapad för att bearbeta textfiler från Retriever-databasen | "
+        "Baserad på original Colab notebook"
+    )
 
-... och här är ytterligare 50 förebilder att inspireras av
-Nya Dagen, 2006-12-29
-Sida 10#11
-Publicerat i print.
 
-[Artikeltext här...]
-
-Alla artiklar är skyddade av upphovsrättslagen...
-Läs hela artikeln på
-http://ret.nu/nS45H0r6
-==============================================================================
-
-[Nästa artikel...]
-        """)
-
-# Footer
-st.markdown("---")
-st.markdown(
-    "Skapad för att bearbeta textfiler från Retriever-databasen | "
-    "Baserad på original Colab notebook"
-)
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+from .text import (
+    FORMAT,
+    KOLUMNER,
+    PARSER_VERSION,
+    Artikel,
+    Artikelindex,
+    IndexeradArtikel,
+    Retrieverformat,
+    avkoda_strömmande,
+    identifiera_format,
+    identifiera_kodning,
+    läs_artiklar,
+    parsa_fil,
+    parsa_filer,
+    retrieverrens,
+    retrieverrens_fil,
+    retrieverrens_iter,
+    sammanfoga,
+    till_dataframe,
+    typa_kolumner,
+)
+from .cache import Parsecache, innehållsnyckel, parsa_filer_cachat
+from .lager import Korpuslager
+from .dubbletter import Dubblettfilter, artikelnyckel
+from .sokning import Sökindex, tokenisera
+from .export import (
+    EXCEL_MAX_RADER,
+    EXCEL_MIME,
+    POSTER_PER_BATCH,
+    arrowtabell,
+    csv_byte,
+    excel_byte,
+    feather_byte,
+    parquet_byte,
+    skriv_excel,
+    skriv_feather,
+    skriv_parquet,
+    skriv_poster_csv,
+    skriv_poster_parquet,
+)
+from .profil import Profil, Stegmätning
+from .pdf import (
+    DEFAULT_PDF_BACKEND,
+    PDF_BACKENDS,
+    PDF_PARSER_VERSION,
+    PageLineCache,
+    article_row,
+    extract_hyperlinks_by_page,
+    extract_toc_from_pdf,
+    iter_retriever_pdf,
+    open_pdf,
+    parse_retriever_pdf,
+    process_single_article,
+    scan_links_by_page,
+)
@@ -0,0 +1,96 @@
+import hashlib
+import threading
+from collections import OrderedDict
+
+from .text import PARSER_VERSION, Filresultat, parsa_filer
+
+
+def innehållsnyckel(data, *delar):
+    """
+    Nyckel för en fils parsade resultat: hash av filens byte, parserversionen
+    och eventuella inställningar som påverkar resultatet
+    """
+    h = hashlib.sha256(data)
+    h.update(repr((PARSER_VERSION,) + delar).encode("utf-8"))
+    return h.hexdigest()
+
+
+class Parsecache:
+    """
+    Begränsad LRU-cache med parsade filer, nycklad på innehållsnyckel().
+    Trådsäker så att den kan delas mellan Streamlit-sessioner.
+    """
+    
+    def __init__(self, max_antal=64):
+        self.max_antal = max_antal
+        self.träffar = 0
+        self.missar = 0
+        self._poster = OrderedDict()
+        self._lås = threading.Lock()
+    
+    def __len__(self):
+        return len(self._poster)
+    
+    def __contains__(self, nyckel):
+        return nyckel in self._poster
+    
+    def hämta(self, nyckel):
+        with self._lås:
+            if nyckel in self._poster:
+                self._poster.move_to_end(nyckel)
+                self.träffar += 1
+                return self._poster[nyckel]
+            self.missar += 1
+            return None
+    
+    def spara(self, nyckel, värde):
+        with self._lås:
+            self._poster[nyckel] = värde
+            self._poster.move_to_end(nyckel)
+            while len(self._poster) > self.max_antal:
+                self._poster.popitem(last=False)
+
+
+def parsa_filer_cachat(filer, cache, indexera=False, max_workers=None, nycklar=None, lager=None,
+                       deduplicera=False, profil=None):
+    """
+    Som parsa_filer, men bara filer som inte redan finns i `cache` parsas.
+    `nycklar` kan anges om filernas innehållsnycklar redan är kända. Med ett
+    Korpuslager som `lager` hämtas och sparas resultaten också på disk. En
+    Profil mäter bara de filer som faktiskt parsas.
+    """
+    if nycklar is None:
+        nycklar = [innehållsnyckel(data, indexera, deduplicera) for _, data in filer]
+    
+    resultat = [cache.hämta(nyckel) for nyckel in nycklar]
+    
+    if lager is not None:
+        for nr, r in enumerate(resultat):
+            if r is None:
+                df = lager.hämta(nycklar[nr])
+                if df is not None:
+                    # Namnet som filen hade när den parsades
+                    namn = df["source_file"].iat[0] if len(df) else filer[nr][0]
+                    resultat[nr] = Filresultat(namn, df, df.attrs["kodning"], None)
+                    cache.spara(nycklar[nr], resultat[nr])
+    
+    saknas = [nr for nr, r in enumerate(resultat) if r is None]
+    
+    nya = parsa_filer(
+        [filer[nr] for nr in saknas], indexera=indexera, max_workers=max_workers, deduplicera=deduplicera,
+        profil=profil
+    )
+    for nr, r in zip(saknas, nya):
+        cache.spara(nycklar[nr], r._replace(profil=None))
+        if lager is not None and r.df is not None:
+            lager.spara(nycklar[nr], r.df)
+        resultat[nr] = r
+    
+    # Samma innehåll kan ha laddats upp under ett annat namn
+    for nr, (namn, _) in enumerate(filer):
+        r = resultat[nr]
+        if r.namn != namn:
+            df = r.df.assign(source_file=namn) if r.df is not None else None
+            resultat[nr] = r._replace(namn=namn, df=df)
+    
+    return resultat
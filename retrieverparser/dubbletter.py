@@ -0,0 +1,59 @@
+import hashlib
+
+
+def _normalisera(värde):
+    return " ".join(str(värde).split()).casefold()
+
+
+def artikelnyckel(länk, rubrik, tidning, datum):
+    """
+    64-bitars nyckel för en artikel: ret.nu-id:t om länken finns, annars
+    normaliserad rubrik + tidning + datum
+    """
+    if länk:
+        nyckel = "id:" + länk.rstrip("/").rsplit("/", 1)[-1]
+    else:
+        nyckel = "meta:" + "\x1f".join(_normalisera(v) for v in (rubrik, tidning, datum))
+    return int.from_bytes(hashlib.blake2b(nyckel.encode("utf-8"), digest_size=8).digest(), "little")
+
+
+class Dubblettfilter:
+    """
+    Håller reda på vilka artiklar som redan setts, som en mängd 64-bitars
+    hashvärden, så att dubbletter kan tas bort medan filerna parsas.
+    """
+    
+    def __init__(self):
+        self._sedda = set()
+        self.borttagna = 0
+    
+    def __len__(self):
+        return len(self._sedda)
+    
+    def är_ny(self, länk, rubrik, tidning, datum):
+        nyckel = artikelnyckel(länk, rubrik, tidning, datum)
+        if nyckel in self._sedda:
+            self.borttagna += 1
+            return False
+        self._sedda.add(nyckel)
+        return True
+    
+    def filtrera(self, artiklar):
+        """
+        Släpper bara igenom artiklar (Artikel-poster) som inte setts förut
+        """
+        for artikel in artiklar:
+            if self.är_ny(artikel.länk, artikel.rubrik, artikel.tidning, artikel.datum):
+                yield artikel
+    
+    def filtrera_df(self, df):
+        """
+        Tar bort rader som redan setts, t.ex. i en tidigare fil
+        """
+        nya = [
+            self.är_ny(länk, rubrik, tidning, datum)
+            for länk, rubrik, tidning, datum in zip(df["länk"], df["rubrik"], df["tidning"], df["datum"])
+        ]
+        if all(nya):
+            return df
+        return df[nya]
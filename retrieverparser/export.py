@@ -0,0 +1,213 @@
+import csv
+import os
+from io import BytesIO, TextIOWrapper
+
+# Parquet komprimeras hårt för lagring och överföring; Feather lämnas
+# okomprimerad så att den kan minnesmappas utan att packas upp
+PARQUET_KOMPRESSION = "zstd"
+FEATHER_KOMPRESSION = "uncompressed"
+
+# Ett Excel-blad rymmer högst så här många rader, rubrikraden inräknad
+EXCEL_MAX_RADER = 1_048_576
+EXCEL_MIME = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+
+# Artiklar per Parquet-radgrupp när poster skrivs allteftersom de parsas
+POSTER_PER_BATCH = 2000
+
+
+def _cellvärde(värde):
+    # Saknade värden (NaN, NA, NaT) blir tomma celler
+    import pandas as pd
+    
+    if värde is None or (not isinstance(värde, (str, bytes)) and pd.isna(värde)):
+        return None
+    return värde
+
+
+def skriv_excel(df, fil, bladnamn="Artiklar", max_rader=EXCEL_MAX_RADER):
+    """
+    Skriver en DataFrame till Excel rad för rad i openpyxl:s write-only-läge,
+    så att hela arbetsboken aldrig byggs upp i minnet. Rader som inte ryms
+    på ett blad fortsätter på "Artiklar 2", "Artiklar 3" och så vidare.
+    """
+    from openpyxl import Workbook
+    
+    arbetsbok = Workbook(write_only=True)
+    per_blad = max_rader - 1
+    kolumner = [str(kolumn) for kolumn in df.columns]
+    antal_blad = max(1, -(-len(df) // per_blad))
+    
+    for nr in range(antal_blad):
+        blad = arbetsbok.create_sheet(bladnamn if nr == 0 else f"{bladnamn} {nr + 1}")
+        blad.append(kolumner)
+        for rad in df.iloc[nr * per_blad:(nr + 1) * per_blad].itertuples(index=False, name=None):
+            blad.append([_cellvärde(värde) for värde in rad])
+    
+    arbetsbok.save(fil)
+
+
+def excel_byte(df, bladnamn="Artiklar", max_rader=EXCEL_MAX_RADER):
+    """
+    Excel-filen som byte, för nedladdning
+    """
+    buffert = BytesIO()
+    skriv_excel(df, buffert, bladnamn=bladnamn, max_rader=max_rader)
+    return buffert.getvalue()
+
+
+def csv_byte(df, kodning="utf-8"):
+    """
+    CSV-filen som byte, för nedladdning
+    """
+    return df.to_csv(index=False).encode(kodning)
+
+
+def arrowtabell(df):
+    """
+    DataFrame som Arrow-tabell med kolumnernas typer bevarade (kategorier som
+    dictionary, datum som timestamp, nullbara heltal). Kolumner utan ett enda
+    värde får typen large_string i stället för null, så att en tom korpus har
+    samma schema som en full. En lista med artiklar (som från
+    parse_retriever_pdf) går också bra.
+    """
+    import pandas as pd
+    import pyarrow as pa
+    
+    if not isinstance(df, pd.DataFrame):
+        df = pd.DataFrame(list(df))
+    tabell = pa.Table.from_pandas(df, preserve_index=False)
+    for nr, fält in enumerate(tabell.schema):
+        if pa.types.is_null(fält.type):
+            tabell = tabell.set_column(nr, fält.with_type(pa.large_string()), tabell.column(nr).cast(pa.large_string()))
+    return tabell
+
+
+def skriv_parquet(df, fil, kompression=PARQUET_KOMPRESSION):
+    """
+    Skriver en DataFrame till Parquet, zstd-komprimerad som standard
+    """
+    import pyarrow.parquet as pq
+    
+    pq.write_table(arrowtabell(df), fil, compression=kompression)
+
+
+def skriv_feather(df, fil, kompression=FEATHER_KOMPRESSION):
+    """
+    Skriver en DataFrame till Arrow IPC (Feather v2). Okomprimerad som
+    standard, så att pyarrow.memory_map kan läsa den utan kopiering.
+    """
+    import pyarrow.feather as feather
+    
+    feather.write_feather(arrowtabell(df), fil, compression=kompression)
+
+
+def parquet_byte(df, kompression=PARQUET_KOMPRESSION):
+    """
+    Parquet-filen som byte, för nedladdning
+    """
+    buffert = BytesIO()
+    skriv_parquet(df, buffert, kompression=kompression)
+    return buffert.getvalue()
+
+
+def feather_byte(df, kompression=FEATHER_KOMPRESSION):
+    """
+    Feather-filen som byte, för nedladdning
+    """
+    buffert = BytesIO()
+    skriv_feather(df, buffert, kompression=kompression)
+    return buffert.getvalue()
+
+
+def _postdict(post):
+    # En artikel som dict: dictar som de är, Artikel-poster (namedtuples) via fälten
+    return post if isinstance(post, dict) else post._asdict()
+
+
+def _textfil(fil, kodning):
+    # En sökväg öppnas; en binär fil lindas in så att csv kan skriva text till den
+    if isinstance(fil, (str, os.PathLike)):
+        return open(fil, "w", encoding=kodning, newline=""), True
+    return TextIOWrapper(fil, encoding=kodning, newline=""), False
+
+
+def skriv_poster_csv(poster, fil, kodning="utf-8", kolumner=None):
+    """
+    Skriver artiklar (dictar som från article_row, eller Artikel-poster) till
+    CSV allteftersom de kommer, utan att samla dem i minnet. `fil` är en
+    sökväg eller en binär fil. Kolumnerna tas från första artikeln om de inte
+    anges; anges de skrivs bara de. Samma CSV som DataFrame.to_csv(index=False).
+    Returnerar antalet skrivna artiklar.
+    """
+    text, egen = _textfil(fil, kodning)
+    antal = 0
+    try:
+        skrivare = None
+        if kolumner is not None:
+            skrivare = csv.DictWriter(
+                text, fieldnames=list(kolumner), lineterminator=os.linesep, extrasaction="ignore"
+            )
+            skrivare.writeheader()
+        for post in poster:
+            post = _postdict(post)
+            if skrivare is None:
+                skrivare = csv.DictWriter(text, fieldnames=list(post), lineterminator=os.linesep)
+                skrivare.writeheader()
+            skrivare.writerow(post)
+            antal += 1
+    finally:
+        if egen:
+            text.close()
+        else:
+            text.flush()
+            text.detach()
+    return antal
+
+
+def skriv_poster_parquet(poster, fil, kompression=PARQUET_KOMPRESSION, kolumner=None,
+                         batch=POSTER_PER_BATCH):
+    """
+    Skriver artiklar (dictar eller Artikel-poster) till Parquet en radgrupp i
+    taget, så att bara `batch` artiklar åt gången hålls i minnet. Schemat tas
+    från första radgruppen; kolumner utan värden blir large_string. Returnerar
+    antalet skrivna artiklar.
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    
+    skrivare = None
+    schema = None
+    antal = 0
+    
+    def skriv_batch(rader):
+        nonlocal skrivare, schema
+        tabell = pa.Table.from_pylist(rader)
+        if kolumner is not None:
+            tabell = tabell.select(list(kolumner))
+        if schema is None:
+            schema = pa.schema([
+                fält.with_type(pa.large_string()) if pa.types.is_null(fält.type) else fält
+                for fält in tabell.schema
+            ])
+            skrivare = pq.ParquetWriter(fil, schema, compression=kompression)
+        skrivare.write_table(tabell.cast(schema))
+    
+    try:
+        rader = []
+        for post in poster:
+            rader.append(_postdict(post))
+            if len(rader) == batch:
+                skriv_batch(rader)
+                antal += len(rader)
+                rader = []
+        if rader:
+            skriv_batch(rader)
+            antal += len(rader)
+        if skrivare is None:
+            # Ingen artikel alls: en tom fil med kolumnerna som strängar
+            schema = pa.schema([(kolumn, pa.large_string()) for kolumn in kolumner or []])
+            skrivare = pq.ParquetWriter(fil, schema, compression=kompression)
+    finally:
+        if skrivare is not None:
+            skrivare.close()
+    return antal
@@ -0,0 +1,326 @@
+"""
+Parsar Retriever-exporter utan Streamlit:
+
+    python -m retrieverparser parse KATALOG --out korpus.parquet --jobs 4
+
+Alla .txt- och .pdf-filer i katalogerna (och deras underkataloger) läses,
+en fil per process, och skrivs till en gemensam fil. Formatet väljs efter
+filändelsen: .parquet, .feather/.arrow, .csv eller .xlsx.
+
+Koden ligger här och inte i __main__ så att funktionerna som körs i
+arbetsprocesserna går att importera där (de startas med spawn).
+"""
+import argparse
+import os
+import sys
+import time
+from io import BytesIO
+
+from .pdf import DEFAULT_PDF_BACKEND, PDF_BACKENDS
+from .profil import INGEN_PROFIL, Profil
+from .text import KOLUMNER, Filresultat, arbetspool, parsa_fil
+
+FILTYPER = (".txt", ".pdf")
+UTFORMAT = (".parquet", ".feather", ".arrow", ".csv", ".xlsx")
+
+# PDF-kolumner som motsvarar textexportens när båda sorterna skrivs till samma fil
+PDF_KOLUMNER = {
+    "Title": "rubrik",
+    "Source": "tidning",
+    "Date": "datum",
+    "Page": "sida",
+    "Full_Text": "text",
+    "URL": "länk",
+    "Author": "författare",
+}
+
+# Kolumnerna, i ordning, när båda sorterna skrivs till samma fil (med och utan --stream)
+BLANDADE_KOLUMNER = list(PDF_KOLUMNER.values()) + ["source_file"]
+
+
+def hitta_filer(sökvägar):
+    """
+    Alla Retriever-exporter under de angivna filerna och katalogerna, sorterade
+    """
+    filer = []
+    for sökväg in sökvägar:
+        if os.path.isdir(sökväg):
+            for katalog, _, namn in os.walk(sökväg):
+                filer.extend(os.path.join(katalog, n) for n in namn if n.lower().endswith(FILTYPER))
+        else:
+            filer.append(sökväg)
+    return sorted(filer)
+
+
+def parsa_pdf(namn, data, profil=None, max_workers=1, backend=DEFAULT_PDF_BACKEND):
+    """
+    Motsvarigheten till parsa_fil för en PDF-export. Med max_workers delas
+    artiklarna upp på flera processer; backend väljer textextraktionen.
+    """
+    import pandas as pd
+    
+    from .pdf import parse_retriever_pdf
+    
+    mätning = profil if profil is not None else INGEN_PROFIL
+    try:
+        artiklar = parse_retriever_pdf(
+            BytesIO(data), profil=mätning, max_workers=max_workers, backend=backend
+        )
+        with mätning.steg("DataFrame", len(artiklar)):
+            df = pd.DataFrame(artiklar, columns=list(PDF_KOLUMNER) if not artiklar else None)
+        df["source_file"] = namn
+        return Filresultat(namn, df, None, None, profil)
+    except Exception as e:
+        return Filresultat(namn, None, None, str(e), profil)
+    finally:
+        mätning.stäng()
+
+
+def _nyckel(sökväg, data, dedupe, pdfmotor):
+    from .cache import innehållsnyckel
+    from .pdf import PDF_PARSER_VERSION
+    
+    if sökväg.lower().endswith(".pdf"):
+        return innehållsnyckel(data, "pdf", PDF_PARSER_VERSION, pdfmotor)
+    return innehållsnyckel(data, False, dedupe)
+
+
+def _parsa_sökväg(sökväg, dedupe=False, lager=None, profil=None, max_workers=1, pdfmotor=DEFAULT_PDF_BACKEND):
+    """
+    Läser och parsar en fil, eller hämtar den ur lagret om den redan är parsad.
+    Körs i arbetsprocessen, så att bara sökvägen och resultatet skickas dit och tillbaka.
+    """
+    with open(sökväg, "rb") as f:
+        data = f.read()
+    namn = os.path.basename(sökväg)
+    if lager is not None:
+        nyckel = _nyckel(sökväg, data, dedupe, pdfmotor)
+        df = lager.hämta(nyckel)
+        if df is not None:
+            return Filresultat(namn, df.assign(source_file=namn), df.attrs.get("kodning"), None)
+    if sökväg.lower().endswith(".pdf"):
+        r = parsa_pdf(namn, data, profil, max_workers, pdfmotor)
+    else:
+        r = parsa_fil(namn, data, False, dedupe, profil)
+    if lager is not None and r.df is not None:
+        lager.spara(nyckel, r.df)
+    return r
+
+
+def parsa(sökvägar, jobb=None, dedupe=False, lager=None, profil=None, pdfmotor=DEFAULT_PDF_BACKEND):
+    """
+    Parsar filerna, var och en i en egen process, och ger Filresultat i
+    samma ordning. Med ett Korpuslager hoppas redan parsade filer över.
+    Med en Profil summeras filernas mätningar i den. `pdfmotor` är
+    textextraktionen för PDF:er, en av PDF_BACKENDS.
+    """
+    profiler = [profil.ny() if profil is not None else None for _ in sökvägar]
+    
+    if len(sökvägar) == 1 and sökvägar[0].lower().endswith(".pdf"):
+        # En ensam PDF delas i stället upp i sidintervall över processerna
+        resultat = [_parsa_sökväg(sökvägar[0], dedupe, lager, profiler[0], jobb, pdfmotor)]
+    elif len(sökvägar) <= 1 or jobb == 1:
+        resultat = [
+            _parsa_sökväg(sökväg, dedupe, lager, filprofil, 1, pdfmotor)
+            for sökväg, filprofil in zip(sökvägar, profiler)
+        ]
+    else:
+        with arbetspool(jobb) as pool:
+            framtider = [
+                pool.submit(_parsa_sökväg, sökväg, dedupe, lager, filprofil, 1, pdfmotor)
+                for sökväg, filprofil in zip(sökvägar, profiler)
+            ]
+            resultat = [framtid.result() for framtid in framtider]
+    
+    if profil is not None:
+        for r in resultat:
+            if r.profil is not None:
+                profil.lägg_in(r.profil)
+    
+    return resultat
+
+
+def slå_ihop(resultat, dedupe=False, typad=False):
+    """
+    Slår ihop filerna till en korpus. Består den bara av PDF-exporter behålls
+    PDF-kolumnerna; annars döps PDF-kolumnerna om till textexportens.
+    """
+    from .text import sammanfoga
+    
+    lyckade = [r for r in resultat if r.df is not None]
+    if lyckade and all(r.kodning is None for r in lyckade):
+        # Dubblettfiltret och typningen arbetar på textexportens kolumnnamn
+        tillbaka = {ny: gammal for gammal, ny in PDF_KOLUMNER.items()}
+        omdöpta = [r._replace(df=r.df.rename(columns=PDF_KOLUMNER)) for r in lyckade]
+        df = sammanfoga(omdöpta, deduplicera=dedupe, typad=typad)
+        attrs = df.attrs
+        df = df.rename(columns=tillbaka)
+        df.attrs = attrs
+        return df
+    
+    blandad = any(r.kodning is None for r in lyckade)
+    lyckade = [
+        r if r.kodning is not None
+        else r._replace(df=r.df[list(PDF_KOLUMNER) + ["source_file"]].rename(columns=PDF_KOLUMNER))
+        for r in lyckade
+    ]
+    df = sammanfoga(lyckade, deduplicera=dedupe, typad=typad)
+    if blandad:
+        # Annars beror kolumnordningen på om en text- eller PDF-export kom först
+        attrs = df.attrs
+        df = df[BLANDADE_KOLUMNER]
+        df.attrs = attrs
+    return df
+
+
+def skriv(df, ut):
+    from .export import skriv_excel, skriv_feather, skriv_parquet
+    
+    ändelse = os.path.splitext(ut)[1].lower()
+    if ändelse == ".parquet":
+        skriv_parquet(df, ut)
+    elif ändelse in (".feather", ".arrow"):
+        skriv_feather(df, ut)
+    elif ändelse == ".csv":
+        df.to_csv(ut, index=False)
+    else:
+        skriv_excel(df, ut)
+
+
+def strömma(sökvägar, ut, dedupe=False, pdfmotor=DEFAULT_PDF_BACKEND):
+    """
+    Parsar filerna en i taget och skriver artiklarna till `ut` (.csv eller
+    .parquet) allteftersom de blir klara, så att minnet inte växer med
+    korpusen. Kolumnerna blir desamma som utan strömning. Returnerar antalet
+    skrivna artiklar, antalet borttagna dubbletter och om någon fil misslyckades.
+    """
+    from .dubbletter import Dubblettfilter
+    from .export import skriv_poster_csv, skriv_poster_parquet
+    from .pdf import article_row
+    from .text import Artikel, läs_artiklar
+    
+    dubblettfilter = Dubblettfilter() if dedupe else None
+    pdfer = [sökväg.lower().endswith(".pdf") for sökväg in sökvägar]
+    if all(pdfer):
+        kolumner = list(article_row(Artikel(*[""] * len(KOLUMNER)))) + ["source_file"]
+    else:
+        kolumner = BLANDADE_KOLUMNER if any(pdfer) else KOLUMNER + ["source_file"]
+    misslyckade = []
+    
+    def artiklar():
+        for sökväg in sökvägar:
+            antal = 0
+            try:
+                for artikel in läs_artiklar(sökväg, dubblettfilter=dubblettfilter, pdfmotor=pdfmotor):
+                    antal += 1
+                    yield {**article_row(artikel), "source_file": artikel.source_file} if all(pdfer) else artikel
+            except Exception as e:
+                misslyckade.append(sökväg)
+                print(f"✗ {sökväg}: {e}", file=sys.stderr)
+            else:
+                print(f"✓ {sökväg}: {antal:,} artiklar", file=sys.stderr)
+    
+    if ut.lower().endswith(".parquet"):
+        antal = skriv_poster_parquet(artiklar(), ut, kolumner=kolumner)
+    else:
+        antal = skriv_poster_csv(artiklar(), ut, kolumner=kolumner)
+    return antal, dubblettfilter.borttagna if dubblettfilter is not None else 0, bool(misslyckade)
+
+
+def skriv_profil(profil, fil=sys.stderr):
+    """
+    Tabell med tid, antal och minnestopp per steg. Stegen i arbetsprocesserna
+    summeras, så med flera processer kan summan bli större än väggklocktiden.
+    """
+    print(f"\n{'steg':<26} {'s':>8} {'andel':>6} {'antal':>10} {'per s':>10} {'topp MB':>8}", file=fil)
+    totalt = profil.sekunder or 1
+    for mätning in profil:
+        per_sekund = f"{mätning.antal / mätning.sekunder:,.0f}" if mätning.antal and mätning.sekunder else ""
+        topp = f"{mätning.topp_byte / 2**20:,.1f}" if mätning.topp_byte is not None else ""
+        print(f"{mätning.namn:<26} {mätning.sekunder:>8.3f} {mätning.sekunder / totalt:>6.0%} "
+              f"{mätning.antal:>10,} {per_sekund:>10} {topp:>8}", file=fil)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m retrieverparser", description="Parsar Retriever-exporter (.txt och .pdf) utan Streamlit."
+    )
+    kommandon = parser.add_subparsers(dest="kommando", required=True)
+    
+    parse = kommandon.add_parser("parse", help="parsa .txt- och .pdf-exporter till en fil")
+    parse.add_argument("sökvägar", nargs="+", metavar="KATALOG", help="kataloger eller enskilda filer")
+    parse.add_argument("--out", "-o", required=True, help="utdatafil: .parquet, .feather, .arrow, .csv eller .xlsx")
+    parse.add_argument("--jobs", "-j", type=int, default=None, help="antal processer (standard: en per kärna)")
+    parse.add_argument("--dedupe", action="store_true", help="ta bort dubbletter inom och mellan filerna")
+    parse.add_argument("--typed", action="store_true", help="kompakta kolumntyper (kategori, datum, heltal)")
+    parse.add_argument("--cache", action="store_true",
+                       help="återanvänd och spara parsade filer i cachen på disk (RETRIEVERPARSER_CACHE)")
+    parse.add_argument("--pdf-backend", choices=PDF_BACKENDS, default=DEFAULT_PDF_BACKEND,
+                       help="textextraktion för PDF:er; pypdfium2 är mycket snabbare, pdfplumber är referensen")
+    parse.add_argument("--profil", choices=["tid", "minne"],
+                       help="visa tid (och med 'minne' även tracemalloc-topp) per steg")
+    parse.add_argument("--stream", action="store_true",
+                       help="parsa en fil i taget och skriv artiklarna allteftersom (.csv eller .parquet), "
+                            "så att minnet inte växer med korpusen")
+    
+    argument = parser.parse_args(argv)
+    
+    if not argument.out.lower().endswith(UTFORMAT):
+        parser.error(f"--out måste sluta på {', '.join(UTFORMAT)}")
+    for sökväg in argument.sökvägar:
+        if not os.path.exists(sökväg):
+            parser.error(f"{sökväg} finns inte")
+    if argument.stream:
+        if not argument.out.lower().endswith((".csv", ".parquet")):
+            parser.error("--stream skriver bara .csv eller .parquet")
+        if argument.typed or argument.cache or argument.profil:
+            parser.error("--stream går inte att kombinera med --typed, --cache eller --profil")
+    
+    sökvägar = hitta_filer(argument.sökvägar)
+    if not sökvägar:
+        parser.error("hittade inga .txt- eller .pdf-filer")
+    
+    lager = None
+    if argument.cache:
+        from .lager import Korpuslager
+        lager = Korpuslager()
+    
+    start = time.perf_counter()
+    if argument.stream:
+        antal, dubbletter, fel = strömma(
+            sökvägar, argument.out, dedupe=argument.dedupe, pdfmotor=argument.pdf_backend
+        )
+        print(
+            f"Skrev {antal:,} artiklar till {argument.out} på {time.perf_counter() - start:.1f} s"
+            + (f" ({dubbletter:,} dubbletter borttagna)" if dubbletter else ""),
+            file=sys.stderr,
+        )
+        return 1 if fel else 0
+    
+    profil = Profil(minne=argument.profil == "minne") if argument.profil else None
+    mätning = profil if profil is not None else INGEN_PROFIL
+    resultat = parsa(
+        sökvägar, jobb=argument.jobs, dedupe=argument.dedupe, lager=lager, profil=profil,
+        pdfmotor=argument.pdf_backend
+    )
+    for sökväg, r in zip(sökvägar, resultat):
+        if r.fel:
+            print(f"✗ {sökväg}: {r.fel}", file=sys.stderr)
+        else:
+            print(f"✓ {sökväg}: {len(r.df):,} artiklar", file=sys.stderr)
+    
+    with mätning.steg("sammanfogning"):
+        df = slå_ihop(resultat, dedupe=argument.dedupe, typad=argument.typed)
+    with mätning.steg("export", len(df)):
+        skriv(df, argument.out)
+    mätning.stäng()
+    
+    dubbletter = df.attrs.get("dubbletter")
+    print(
+        f"Skrev {len(df):,} artiklar till {argument.out} på {time.perf_counter() - start:.1f} s"
+        + (f" ({dubbletter:,} dubbletter borttagna)" if dubbletter else ""),
+        file=sys.stderr,
+    )
+    if profil is not None:
+        skriv_profil(profil)
+    return 1 if any(r.fel for r in resultat) else 0
@@ -0,0 +1,160 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from contextlib import closing
+
+# Var lagret hamnar och hur stort det får bli om inget annat anges
+STANDARDKATALOG = os.path.join(os.path.expanduser("~"), ".cache", "retrieverparser")
+STANDARD_MAX_MB = 1024
+
+# Nyckeln i Parquet-schemats metadata där DataFrame:ns attrs sparas
+ATTRS_NYCKEL = b"retrieverparser.attrs"
+
+
+class Korpuslager:
+    """
+    Beständigt lager på disk för parsade korpusar, nycklat på innehållsnyckel().
+    
+    Varje post sparas som en Parquet-fil med sin DataFrame; attrs sparas som
+    JSON i schemats metadata. Till skillnad från pickle kör en Parquet-fil
+    ingen kod när den läses, och den går att läsa efter en pandas-uppgradering.
+    Ett SQLite-index håller reda på storlek och senaste användning, och de
+    minst nyligen använda posterna tas bort när lagret blir större än `max_byte`.
+    Katalog och storlek kan också sättas med miljövariablerna
+    RETRIEVERPARSER_CACHE och RETRIEVERPARSER_CACHE_MB.
+    """
+    
+    def __init__(self, katalog=None, max_byte=None):
+        if katalog is None:
+            katalog = os.environ.get("RETRIEVERPARSER_CACHE", STANDARDKATALOG)
+        if max_byte is None:
+            max_byte = int(float(os.environ.get("RETRIEVERPARSER_CACHE_MB", STANDARD_MAX_MB)) * 1024 * 1024)
+        self.katalog = katalog
+        self.max_byte = max_byte
+        self._lås = threading.Lock()
+        
+        os.makedirs(self.katalog, exist_ok=True)
+        with self._anslut() as db:
+            db.execute(
+                "CREATE TABLE IF NOT EXISTS poster ("
+                "nyckel TEXT PRIMARY KEY, storlek INTEGER NOT NULL, senast REAL NOT NULL)"
+            )
+            self._städa_pickle(db)
+    
+    def __reduce__(self):
+        # Låset går inte att pickla; en arbetsprocess öppnar samma lager på nytt
+        return (Korpuslager, (self.katalog, self.max_byte))
+    
+    def _anslut(self):
+        # En ny anslutning per anrop, så att lagret kan delas mellan trådar och processer
+        return _Transaktion(os.path.join(self.katalog, "index.sqlite"))
+    
+    def _sökväg(self, nyckel):
+        return os.path.join(self.katalog, f"{nyckel}.parquet")
+    
+    def _städa_pickle(self, db):
+        # Lagret sparade tidigare pickle-filer; de läses aldrig, utan tas bort
+        # tillsammans med sina poster så att de inte räknas mot storleken
+        for (nyckel,) in db.execute("SELECT nyckel FROM poster").fetchall():
+            gammal = os.path.join(self.katalog, f"{nyckel}.pkl")
+            if os.path.exists(gammal):
+                os.remove(gammal)
+                db.execute("DELETE FROM poster WHERE nyckel = ?", (nyckel,))
+    
+    def __contains__(self, nyckel):
+        with self._anslut() as db:
+            return db.execute("SELECT 1 FROM poster WHERE nyckel = ?", (nyckel,)).fetchone() is not None
+    
+    def __len__(self):
+        with self._anslut() as db:
+            return db.execute("SELECT COUNT(*) FROM poster").fetchone()[0]
+    
+    def storlek(self):
+        """
+        Lagrets totala storlek i byte
+        """
+        with self._anslut() as db:
+            return db.execute("SELECT COALESCE(SUM(storlek), 0) FROM poster").fetchone()[0]
+    
+    def hämta(self, nyckel):
+        """
+        Läser in en sparad DataFrame, eller None om nyckeln saknas
+        """
+        with self._lås, self._anslut() as db:
+            träff = db.execute("UPDATE poster SET senast = ? WHERE nyckel = ?", (time.time(), nyckel)).rowcount
+        if not träff:
+            return None
+        import pyarrow.parquet as pq
+        
+        try:
+            tabell = pq.read_table(self._sökväg(nyckel))
+            df = tabell.to_pandas()
+            df.attrs = json.loads((tabell.schema.metadata or {}).get(ATTRS_NYCKEL, b"{}"))
+            return df
+        except Exception:
+            # Trasig eller borttagen fil: glöm posten och parsa om
+            self.ta_bort(nyckel)
+            return None
+    
+    def spara(self, nyckel, df):
+        """
+        Sparar en DataFrame och rensar bort gamla poster om lagret blivit för stort
+        """
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+        
+        tabell = pa.Table.from_pandas(df, preserve_index=False)
+        tabell = tabell.replace_schema_metadata(
+            {**(tabell.schema.metadata or {}), ATTRS_NYCKEL: json.dumps(df.attrs).encode("utf-8")}
+        )
+        sökväg = self._sökväg(nyckel)
+        tillfällig = f"{sökväg}.{os.getpid()}.{threading.get_ident()}.tmp"
+        pq.write_table(tabell, tillfällig)
+        os.replace(tillfällig, sökväg)
+        
+        with self._lås, self._anslut() as db:
+            db.execute(
+                "INSERT OR REPLACE INTO poster (nyckel, storlek, senast) VALUES (?, ?, ?)",
+                (nyckel, os.path.getsize(sökväg), time.time())
+            )
+            self._rensa(db)
+    
+    def ta_bort(self, nyckel):
+        with self._lås, self._anslut() as db:
+            db.execute("DELETE FROM poster WHERE nyckel = ?", (nyckel,))
+        try:
+            os.remove(self._sökväg(nyckel))
+        except FileNotFoundError:
+            pass
+    
+    def _rensa(self, db):
+        totalt = db.execute("SELECT COALESCE(SUM(storlek), 0) FROM poster").fetchone()[0]
+        if totalt <= self.max_byte:
+            return
+        for nyckel, storlek in db.execute("SELECT nyckel, storlek FROM poster ORDER BY senast").fetchall():
+            if totalt <= self.max_byte:
+                break
+            db.execute("DELETE FROM poster WHERE nyckel = ?", (nyckel,))
+            try:
+                os.remove(self._sökväg(nyckel))
+            except FileNotFoundError:
+                pass
+            totalt -= storlek
+
+
+class _Transaktion:
+    """
+    En SQLite-anslutning som committar och stängs när with-blocket lämnas
+    """
+    
+    def __init__(self, sökväg):
+        self._db = sqlite3.connect(sökväg, timeout=30)
+    
+    def __enter__(self):
+        return self._db.__enter__()
+    
+    def __exit__(self, *exc):
+        with closing(self._db):
+            return self._db.__exit__(*exc)
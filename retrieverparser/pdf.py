@@ -0,0 +1,680 @@
+import ctypes
+import os
+import re
+from collections import OrderedDict
+from io import BytesIO
+
+from .profil import INGEN_PROFIL
+from .text import Artikel, arbetspool
+
+# Bump when the extraction changes so stored results are not reused
+PDF_PARSER_VERSION = "9.0"
+
+# Fewer articles than this per worker and the extra document opens cost
+# more than the parallel extraction saves
+MIN_ARTICLES_PER_SHARD = 10
+
+# Page text backends; pdfplumber (full pdfminer layout analysis) is the
+# reference, pypdfium2 reads the text in the order it is drawn and is much faster
+PDF_BACKENDS = ("pdfplumber", "pypdfium2")
+DEFAULT_PDF_BACKEND = "pdfplumber"
+
+
+class PlumberDocument:
+    """
+    Page text and links of a PDF through pdfplumber. An already open
+    pdfplumber PDF can be passed instead of a file; it is then left open.
+    
+    pdfplumber keeps every page's characters and layout on the open PDF
+    until it is closed, so a page's caches are released as soon as its text
+    has been taken; memory then stays flat however long the document is.
+    """
+    
+    backend = "pdfplumber"
+    
+    def __init__(self, pdf_file):
+        import pdfplumber
+        
+        self._owned = not isinstance(pdf_file, pdfplumber.PDF)
+        self._pdf = pdfplumber.open(pdf_file) if self._owned else pdf_file
+    
+    def __len__(self):
+        return len(self._pdf.pages)
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc):
+        self.close()
+    
+    def text(self, page_num):
+        page = self._pdf.pages[page_num]
+        text = page.extract_text()
+        # Page.close arrived in pdfplumber 0.11; flush_cache does most of it before that
+        getattr(page, 'close', page.flush_cache)()
+        return text
+    
+    def links(self, page_num):
+        return _annotation_uris(self._pdf.pages[page_num].page_obj.annots)
+    
+    def outline(self):
+        """(title, page index or None) for each outline entry, in order"""
+        try:
+            entries = list(self._pdf.doc.get_outlines())
+        except Exception:
+            # No outline, or a broken one: the TOC pages are read instead
+            return []
+        page_index = {page.page_obj.pageid: page_num for page_num, page in enumerate(self._pdf.pages)}
+        return [
+            (_decode_title(title), _destination_page(self._pdf.doc, dest, action, page_index))
+            for _, title, dest, action, _ in entries
+        ]
+    
+    def close(self):
+        if self._owned:
+            self._pdf.close()
+
+
+class PdfiumDocument:
+    """
+    Page text and links of a PDF through pypdfium2. Lines come out in the
+    order the text is drawn, which for Retriever exports is the same as
+    pdfplumber's reading order, without the layout analysis.
+    """
+    
+    backend = "pypdfium2"
+    
+    def __init__(self, pdf_file):
+        import pypdfium2
+        
+        self._pdf = pypdfium2.PdfDocument(pdf_file)
+    
+    def __len__(self):
+        return len(self._pdf)
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc):
+        self.close()
+    
+    def text(self, page_num):
+        page = self._pdf[page_num]
+        textpage = page.get_textpage()
+        try:
+            text = textpage.get_text_bounded()
+        finally:
+            textpage.close()
+            page.close()
+        # pdfium marks hyphens at line ends specially; pdfplumber gives the glyph
+        return text.replace('\r\n', '\n').replace('\x02', '-').replace('\ufffe', '-')
+    
+    def links(self, page_num):
+        import pypdfium2.raw as pdfium_c
+        
+        page = self._pdf[page_num]
+        uris = []
+        try:
+            position = ctypes.c_int(0)
+            link = pdfium_c.FPDF_LINK()
+            while pdfium_c.FPDFLink_Enumerate(page.raw, ctypes.byref(position), ctypes.byref(link)):
+                action = pdfium_c.FPDFLink_GetAction(link)
+                if not action or pdfium_c.FPDFAction_GetType(action) != pdfium_c.PDFACTION_URI:
+                    continue
+                size = pdfium_c.FPDFAction_GetURIPath(self._pdf.raw, action, None, 0)
+                buffer = ctypes.create_string_buffer(size)
+                pdfium_c.FPDFAction_GetURIPath(self._pdf.raw, action, buffer, size)
+                if buffer.value:
+                    uris.append(buffer.value.decode('utf-8', 'replace'))
+        finally:
+            page.close()
+        return uris
+    
+    def outline(self):
+        """(title, page index or None) for each outline entry, in order"""
+        entries = []
+        for item in self._pdf.get_toc():
+            if hasattr(item, 'get_title'):
+                dest = item.get_dest()
+                entries.append((item.get_title(), dest.get_index() if dest is not None else None))
+            else:
+                # pypdfium2 4 yields plain outline tuples
+                entries.append((item.title, item.page_index))
+        return entries
+    
+    def close(self):
+        self._pdf.close()
+
+
+def open_pdf(pdf_file, backend=DEFAULT_PDF_BACKEND):
+    """Open a PDF (path or file object) with one of PDF_BACKENDS"""
+    if backend == "pdfplumber":
+        return PlumberDocument(pdf_file)
+    if backend == "pypdfium2":
+        return PdfiumDocument(pdf_file)
+    raise ValueError(f"Unknown PDF backend {backend!r}, expected one of {', '.join(PDF_BACKENDS)}")
+
+
+def _document(pdf):
+    # process_single_article also takes an open pdfplumber PDF, as it always has
+    return pdf if isinstance(pdf, (PlumberDocument, PdfiumDocument)) else PlumberDocument(pdf)
+
+
+def _decode_title(title):
+    from pdfminer.utils import decode_text
+    
+    return decode_text(title) if isinstance(title, bytes) else str(title or '')
+
+
+def _destination_page(doc, dest, action, page_index):
+    # Page index of a pdfminer outline entry's target: an explicit destination,
+    # a named one, or either of those behind a GoTo action
+    from pdfminer.pdftypes import PDFObjRef, resolve1
+    from pdfminer.psparser import PSLiteral
+    
+    action = resolve1(action)
+    if dest is None and isinstance(action, dict):
+        dest = action.get('D')
+    dest = resolve1(dest)
+    if isinstance(dest, (bytes, str, PSLiteral)):
+        try:
+            dest = resolve1(doc.get_dest(dest.name if isinstance(dest, PSLiteral) else dest))
+        except Exception:
+            return None
+    if isinstance(dest, dict):
+        dest = resolve1(dest.get('D'))
+    if isinstance(dest, list) and dest and isinstance(dest[0], PDFObjRef):
+        return page_index.get(dest[0].objid)
+    return None
+
+
+class PageLineCache:
+    """
+    Bounded LRU cache of the extracted lines of an open document's pages
+    (see open_pdf), keyed by page index, so that each page's layout analysis
+    runs once per parse even when articles share a page. Lines are stripped,
+    empty lines and the running header are dropped.
+    """
+    
+    def __init__(self, document, max_pages=16, profil=INGEN_PROFIL):
+        self.document = document
+        self.max_pages = max_pages
+        self.hits = 0
+        self.misses = 0
+        self._profil = profil
+        self._pages = OrderedDict()
+    
+    def __len__(self):
+        return len(self._pages)
+    
+    def lines(self, page_num):
+        if page_num in self._pages:
+            self._pages.move_to_end(page_num)
+            self.hits += 1
+            return self._pages[page_num]
+        self.misses += 1
+        with self._profil.steg("page layout", 1):
+            page_text = self.document.text(page_num)
+        lines = tuple(
+            line for line in (line.strip() for line in page_text.split('\n'))
+            if line and
+            'Tidningsartiklar - Kandidatuppsats' not in line and
+            not line.startswith('Datum 2026')
+        )
+        self._pages[page_num] = lines
+        while len(self._pages) > self.max_pages:
+            self._pages.popitem(last=False)
+        return lines
+
+
+def _outline_toc(document):
+    """
+    TOC entries from the document outline, when its entries carry the same
+    'title \ue618 source date' as the TOC lines; the destinations give the
+    exact article pages. None if there is no outline or it mostly holds
+    something else (headings without a source and date are skipped).
+    """
+    outline = document.outline()
+    articles_toc = []
+    
+    for title, page_index in outline:
+        if page_index is None or '\ue618' not in title:
+            continue
+        parts = title.split('\ue618')
+        if parts[0].strip() == '':
+            continue
+        
+        match = re.search(r'^(.+?)\s+(\d{4}-\d{2}-\d{2})(?:\s+\d{1,4})?$', parts[1].strip())
+        if match:
+            articles_toc.append({
+                'title': parts[0].strip(),
+                'source': match.group(1).strip(),
+                'date': match.group(2),
+                'page': page_index + 1
+            })
+    
+    if not articles_toc or len(articles_toc) * 2 < len(outline):
+        return None
+    return articles_toc
+
+
+def _scan_toc(page_cache):
+    # TOC entries from the outline if there is one, otherwise from the TOC
+    # pages read through a PageLineCache
+    articles_toc = _outline_toc(page_cache.document)
+    if articles_toc is not None:
+        return articles_toc
+    return _scan_toc_pages(page_cache)
+
+
+def _scan_toc_pages(page_cache):
+    # TOC entries read through a PageLineCache; the first page after the TOC,
+    # which the scan has to read, stays cached for the article pass
+    articles_toc = []
+    toc_lines = []
+    toc_end_page = 4
+    
+    for page_num in range(min(30, len(page_cache.document))):
+        lines = page_cache.lines(page_num)
+        
+        toc_like_lines = sum(1 for line in lines 
+                            if re.search(r'\d{4}-\d{2}-\d{2}\s+\d{1,4}$', line))
+        
+        if toc_like_lines < 5 and page_num >= 4:
+            toc_end_page = page_num
+            break
+        
+        toc_lines.extend(lines)
+        toc_end_page = page_num + 1
+    
+    for line in toc_lines:
+        if 'Kandidatuppsats' in line or 'Datum 2026' in line or 'Tidningsartiklar' in line:
+            continue
+        if line in ['heder, hedersrelaterat', 'Tidningar', 'Tidning', 'Heders', 'Allehanda', 'Socialdemokraten', 'Nyheter', 'Nyheter -']:
+            continue
+        
+        if '\ue618' in line:
+            parts = line.split('\ue618')
+            
+            if parts[0].strip() == '':
+                continue
+            
+            if len(parts) >= 2:
+                title = parts[0].strip()
+                rest = parts[1].strip()
+                
+                match = re.search(r'^(.+?)\s+(\d{4}-\d{2}-\d{2})\s+(\d{1,3})$', rest)
+                if match:
+                    source = match.group(1).strip()
+                    date = match.group(2)
+                    page_num = int(match.group(3))
+                    
+                    articles_toc.append({
+                        'title': title,
+                        'source': source,
+                        'date': date,
+                        'page': page_num
+                    })
+    
+    return articles_toc
+
+
+def extract_toc_from_pdf(pdf_file, backend=DEFAULT_PDF_BACKEND):
+    """Extract table of contents with article metadata"""
+    with open_pdf(pdf_file, backend) as document:
+        return _scan_toc(PageLineCache(document))
+
+
+def _decode_pdf_string(value):
+    # As pdfplumber decodes annotation strings: UTF-8, else UTF-16, else left out
+    for encoding in ('utf-8', 'utf-16'):
+        try:
+            return value.decode(encoding)
+        except UnicodeDecodeError:
+            pass
+    return None
+
+
+def _annotation_uris(annots):
+    # URIs of the link actions in a page's raw /Annots entry
+    from pdfminer.pdftypes import resolve1
+    
+    uris = []
+    for annot in resolve1(annots) or []:
+        annot = resolve1(annot)
+        action = resolve1(annot.get('A')) if isinstance(annot, dict) else None
+        uri = resolve1(action.get('URI')) if isinstance(action, dict) else None
+        if isinstance(uri, bytes):
+            uri = _decode_pdf_string(uri)
+        if uri:
+            uris.append(uri)
+    return uris
+
+
+def _page_dicts(document):
+    # The page dictionaries of a pdfminer PDFDocument in page order, walking
+    # the page tree without building page objects
+    from pdfminer.pdfpage import PDFPage
+    from pdfminer.pdftypes import PDFObjRef, resolve1
+    
+    pages = []
+    seen = set()
+    stack = [document.catalog.get('Pages')]
+    while stack:
+        node = stack.pop()
+        if isinstance(node, PDFObjRef):
+            if node.objid in seen:
+                continue
+            seen.add(node.objid)
+        node = resolve1(node)
+        if not isinstance(node, dict):
+            continue
+        if 'Kids' in node:
+            stack.extend(reversed(resolve1(node['Kids']) or []))
+        else:
+            pages.append(node)
+    
+    # A broken page tree: pdfminer finds the pages through the xref instead
+    return pages or [page.attrs for page in PDFPage.create_pages(document)]
+
+
+def scan_links_by_page(pdf_file):
+    """
+    Hyperlinks organized by page, read straight from each page dictionary's
+    /Annots through pdfminer's object layer. No page objects, characters or
+    layout are built, so this costs a fraction of a pdfplumber pass.
+    """
+    from pdfminer.pdfdocument import PDFDocument
+    from pdfminer.pdfparser import PDFParser
+    
+    if isinstance(pdf_file, (str, os.PathLike)):
+        with open(pdf_file, 'rb') as f:
+            return scan_links_by_page(f)
+    
+    document = PDFDocument(PDFParser(pdf_file))
+    return {
+        page_num: _annotation_uris(page.get('Annots'))
+        for page_num, page in enumerate(_page_dicts(document))
+    }
+
+
+def extract_hyperlinks_by_page(pdf_file, backend=DEFAULT_PDF_BACKEND):
+    """
+    Extract hyperlinks organized by page - memory optimized.
+    With pdfplumber this is scan_links_by_page, on the same pdfminer objects.
+    """
+    if backend == "pdfplumber":
+        return scan_links_by_page(pdf_file)
+    with open_pdf(pdf_file, backend) as document:
+        return {page_num: document.links(page_num) for page_num in range(len(document))}
+
+
+def process_single_article(pdf, toc_entry, toc_idx, articles_toc, links_by_page=None, page_cache=None):
+    """
+    Process a single article - memory optimized.
+    `pdf` is a document from open_pdf, or an open pdfplumber PDF.
+    Without links_by_page the URL is read from the article's first page only.
+    Pass the same PageLineCache for all articles of a parse so that pages
+    shared between articles are only extracted once.
+    """
+    if page_cache is None:
+        page_cache = PageLineCache(_document(pdf))
+    document = page_cache.document
+    page_num = toc_entry['page'] - 1
+    
+    if page_num >= len(document):
+        return None
+    
+    lines = page_cache.lines(page_num)
+    
+    author = ""
+    article_text = []
+    
+    source_line_idx = None
+    for i, line in enumerate(lines):
+        if '|' in line and ('Sida:' in line or 'Sida ' in line):
+            source_line_idx = i
+            break
+    
+    if source_line_idx is not None:
+        if source_line_idx + 1 < len(lines):
+            potential_author = lines[source_line_idx + 1]
+            
+            words = potential_author.split()
+            if (len(words) >= 1 and len(words) <= 6 and
+                len(potential_author) < 100 and
+                not potential_author.endswith('.') and
+                'Optional[©' not in potential_author and
+                'Alla artiklar är skyddade' not in potential_author):
+                author = potential_author
+                text_start_idx = source_line_idx + 2
+            else:
+                text_start_idx = source_line_idx + 1
+        else:
+            text_start_idx = source_line_idx + 1
+        
+        for line in lines[text_start_idx:]:
+            if ('Optional[©' in line or 
+                'Alla artiklar är skyddade' in line or 
+                'Klicka här för att' in line):
+                break
+            article_text.append(line)
+    
+    next_article_page = None
+    if toc_idx + 1 < len(articles_toc):
+        next_article_page = articles_toc[toc_idx + 1]['page'] - 1
+    
+    current_page = page_num + 1
+    max_pages = 10
+    pages_read = 0
+    
+    while current_page < len(document) and pages_read < max_pages:
+        if next_article_page and current_page >= next_article_page:
+            break
+        
+        lines = [line for line in page_cache.lines(current_page) if 
+                 not line.startswith('Sida ') and
+                 line not in ['Retriever', 'Nyheter']]
+        
+        found_copyright = False
+        for line in lines:
+            if ('Optional[©' in line or 
+                'Alla artiklar är skyddade' in line or 
+                'Klicka här för att' in line):
+                found_copyright = True
+                break
+            article_text.append(line)
+        
+        if found_copyright:
+            break
+        
+        current_page += 1
+        pages_read += 1
+    
+    full_article_text = ' '.join(article_text).strip()
+    
+    # Limit text length to save memory
+    max_text_length = 10000  # Characters
+    if len(full_article_text) > max_text_length:
+        full_article_text = full_article_text[:max_text_length]
+    
+    if links_by_page is None:
+        links = document.links(page_num)
+    else:
+        links = links_by_page.get(page_num, [])
+    url = links[0] if links else ""
+    
+    article = Artikel(
+        rubrik=toc_entry['title'],
+        tidning=toc_entry['source'],
+        datum=toc_entry['date'],
+        sida=str(toc_entry['page']),
+        text=full_article_text,
+        länk=url,
+        författare=author
+    )
+    
+    # Clear variables
+    del lines, article_text, full_article_text
+    
+    return article
+
+
+def article_row(article):
+    """The app's dict for an Artikel record, with the derived preview and count fields"""
+    full_text = article.text
+    return {
+        'Title': article.rubrik,
+        'Source': article.tidning,
+        'Date': article.datum,
+        'Page': article.sida,
+        'Author': article.författare,
+        'URL': article.länk,
+        'Article_Text': full_text[:1000] if len(full_text) > 1000 else full_text,
+        'Full_Text': full_text,
+        'Has_Text': len(full_text) > 0,
+        'Text_Length': len(full_text),
+        'Word_Count': len(full_text.split()) if full_text else 0
+    }
+
+
+def _pdf_source(pdf_file):
+    # Something a worker process can open itself: a path as is, otherwise the bytes
+    if isinstance(pdf_file, (str, os.PathLike)):
+        return pdf_file
+    if isinstance(pdf_file, (bytes, bytearray)):
+        return bytes(pdf_file)
+    pdf_file.seek(0)
+    return pdf_file.read()
+
+
+def _shards(articles_toc, page_count, count):
+    """
+    Split the TOC into `count` contiguous index ranges with about the same
+    number of article pages each
+    """
+    spans = []
+    for toc_idx, toc_entry in enumerate(articles_toc):
+        # An article is read up to the next one's first page, at most 11 pages
+        start = toc_entry['page'] - 1
+        end = start + 11
+        if toc_idx + 1 < len(articles_toc):
+            end = min(end, articles_toc[toc_idx + 1]['page'] - 1)
+        spans.append(max(1, min(end, page_count) - start))
+    
+    # A shard ends before the article whose middle passes the shard's share
+    total = sum(spans)
+    bounds = [0]
+    pages = 0
+    for toc_idx, span in enumerate(spans):
+        if len(bounds) < count and toc_idx > bounds[-1] and pages + span / 2 > total * len(bounds) / count:
+            bounds.append(toc_idx)
+        pages += span
+    bounds.append(len(articles_toc))
+    return list(zip(bounds, bounds[1:]))
+
+
+def _parse_shard(source, articles_toc, start, stop, profil=None, backend=DEFAULT_PDF_BACKEND):
+    # One worker's share of the articles, with its own document handle and page cache
+    mätning = profil if profil is not None else INGEN_PROFIL
+    articles = []
+    try:
+        with open_pdf(BytesIO(source) if isinstance(source, bytes) else source, backend) as document:
+            page_cache = PageLineCache(document, profil=mätning)
+            for toc_idx in range(start, stop):
+                with mätning.steg("article text", 1):
+                    article = process_single_article(
+                        document, articles_toc[toc_idx], toc_idx, articles_toc, page_cache=page_cache
+                    )
+                if article:
+                    articles.append(article)
+            mätning.räkna("page cache hits", page_cache.hits)
+    finally:
+        mätning.stäng()
+    return articles, profil
+
+
+def iter_retriever_pdf(pdf_file, progress_callback=None, profil=INGEN_PROFIL, max_workers=1,
+                       backend=DEFAULT_PDF_BACKEND):
+    """
+    Yield the articles of a Retriever PDF as Artikel records, in TOC order.
+    The PDF is opened once: the TOC pages are read first, then each article's
+    pages, with its link taken from the annotations of its first page. Page
+    text goes through a PageLineCache, so no page is laid out twice, and
+    each article is yielded as soon as it is done. Only the cached lines of
+    the last few pages are kept, so memory does not grow with the document;
+    write the articles out as they come (see skriv_poster_csv) to keep the
+    whole parse flat. With a Profil, the TOC, page layout and per-article text stages are
+    timed, and the cache hits are counted.
+    
+    With max_workers other than 1 (None for one per core) the articles are
+    split into page-contiguous shards, each parsed in its own process with
+    its own handle on the document; the result is the same as sequentially.
+    `backend` picks the page text extraction, one of PDF_BACKENDS.
+    """
+    if max_workers != 1:
+        source = _pdf_source(pdf_file)
+        pdf_file = BytesIO(source) if isinstance(source, bytes) else source
+    
+    with open_pdf(pdf_file, backend) as document:
+        page_cache = PageLineCache(document, profil=profil)
+        
+        # Extract TOC
+        with profil.steg("TOC"):
+            articles_toc = _scan_toc(page_cache)
+        total_articles = len(articles_toc)
+        profil.räkna("TOC", total_articles)
+        
+        if progress_callback:
+            progress_callback(0.2, f"Found {total_articles} articles in TOC")
+        
+        page_count = len(document)
+        workers = 1
+        if max_workers != 1:
+            workers = min(max_workers or os.cpu_count() or 1, total_articles // MIN_ARTICLES_PER_SHARD)
+        
+        if workers <= 1:
+            for toc_idx, toc_entry in enumerate(articles_toc):
+                with profil.steg("article text", 1):
+                    article = process_single_article(document, toc_entry, toc_idx, articles_toc, page_cache=page_cache)
+                
+                if article:
+                    yield article
+                
+                # Update progress
+                if progress_callback and toc_idx % 5 == 0:
+                    progress = 0.2 + (0.7 * (toc_idx + 1) / total_articles)
+                    progress_callback(progress, f"Processing article {toc_idx + 1} of {total_articles}")
+        
+        profil.räkna("page cache hits", page_cache.hits)
+    
+    if workers > 1:
+        shards = _shards(articles_toc, page_count, workers)
+        with arbetspool(workers) as pool:
+            futures = [
+                pool.submit(_parse_shard, source, articles_toc, start, stop,
+                            profil.ny() if profil is not INGEN_PROFIL else None, backend)
+                for start, stop in shards
+            ]
+            # Results come back in TOC order, shard by shard
+            for (start, stop), future in zip(shards, futures):
+                articles, shard_profil = future.result()
+                if shard_profil is not None:
+                    profil.lägg_in(shard_profil)
+                yield from articles
+                
+                if progress_callback:
+                    progress = 0.2 + (0.7 * stop / total_articles)
+                    progress_callback(progress, f"Processed article {stop} of {total_articles}")
+    
+    if progress_callback:
+        progress_callback(1.0, "Complete!")
+
+
+def parse_retriever_pdf(pdf_file, progress_callback=None, profil=INGEN_PROFIL, max_workers=1,
+                        backend=DEFAULT_PDF_BACKEND):
+    """Parse Retriever PDF using TOC into a list of article_row dicts, with progress tracking"""
+    return [
+        article_row(article)
+        for article in iter_retriever_pdf(pdf_file, progress_callback, profil, max_workers, backend)
+    ]
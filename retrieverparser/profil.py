@@ -0,0 +1,174 @@
+import time
+import tracemalloc
+from collections import namedtuple
+from contextlib import contextmanager, nullcontext
+
+# Ett stegs sammanlagda mätning: tid, antal behandlade enheter och
+# tracemalloc-toppen under steget (None om minnet inte mättes)
+Stegmätning = namedtuple("Stegmätning", ["namn", "sekunder", "antal", "topp_byte"])
+
+
+class Profil:
+    """
+    Samlar tid, antal och minnestopp per steg i en parsning.
+    
+    Steg kan vara nästlade (med `steg()` eller `iterera()`); tiden räknas
+    då bara till det innersta steget, så att stegen summerar till totaltiden.
+    Med `minne` startas tracemalloc och toppen av allokerat minne sparas per
+    steg. Det gör parsningen märkbart långsammare och är därför avstängt som
+    standard; stäng() (eller en with-sats) stänger av den igen. En Profil kan
+    picklas, så att arbetsprocesser kan fylla i och skicka tillbaka sin egen.
+    """
+    
+    def __init__(self, minne=False):
+        self.minne = minne
+        self._mätningar = {}
+        self._stack = []
+        self._startade_tracemalloc = False
+    
+    def __len__(self):
+        return len(self._mätningar)
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc):
+        self.stäng()
+    
+    def __iter__(self):
+        for namn, (sekunder, antal, topp) in self._mätningar.items():
+            yield Stegmätning(namn, sekunder, antal, topp)
+    
+    def __getstate__(self):
+        tillstånd = self.__dict__.copy()
+        tillstånd["_stack"] = []
+        tillstånd["_startade_tracemalloc"] = False
+        return tillstånd
+    
+    def ny(self):
+        """
+        En tom Profil med samma inställningar
+        """
+        return Profil(minne=self.minne)
+    
+    def _lägg_till(self, namn, sekunder, antal=0, topp=None):
+        mätning = self._mätningar.setdefault(namn, [0.0, 0, None])
+        mätning[0] += sekunder
+        mätning[1] += antal
+        if topp is not None:
+            mätning[2] = topp if mätning[2] is None else max(mätning[2], topp)
+    
+    def _minnestopp(self):
+        # Toppen sedan förra avläsningen; nollställs så att nästa steg mäts för sig
+        if not self.minne or not tracemalloc.is_tracing():
+            return None
+        topp = tracemalloc.get_traced_memory()[1]
+        tracemalloc.reset_peak()
+        return topp
+    
+    def _in(self, namn):
+        if self.minne and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._startade_tracemalloc = True
+        nu = time.perf_counter()
+        topp = self._minnestopp()
+        if self._stack:
+            yttre = self._stack[-1]
+            self._lägg_till(yttre[0], nu - yttre[1], topp=topp)
+        self._stack.append([namn, nu])
+    
+    def _ut(self, antal=0):
+        nu = time.perf_counter()
+        namn, start = self._stack.pop()
+        self._lägg_till(namn, nu - start, antal, self._minnestopp())
+        if self._stack:
+            self._stack[-1][1] = nu
+    
+    @contextmanager
+    def steg(self, namn, antal=0):
+        """
+        Mäter ett block. `antal` kan också sättas efteråt med räkna().
+        """
+        self._in(namn)
+        try:
+            yield self
+        finally:
+            self._ut(antal)
+    
+    def räkna(self, namn, antal):
+        """
+        Lägger till behandlade enheter till ett steg utan att mäta tid
+        """
+        self._lägg_till(namn, 0.0, antal)
+    
+    def iterera(self, namn, iterator):
+        """
+        Släpper igenom en iterator och räknar tiden i den, och antalet element,
+        till steget `namn`
+        """
+        iterator = iter(iterator)
+        while True:
+            self._in(namn)
+            try:
+                element = next(iterator)
+            except StopIteration:
+                self._ut()
+                return
+            except BaseException:
+                self._ut()
+                raise
+            self._ut(1)
+            yield element
+    
+    def lägg_in(self, annan):
+        """
+        Summerar in en annan Profils mätningar, t.ex. från en arbetsprocess
+        """
+        for mätning in annan:
+            self._lägg_till(mätning.namn, mätning.sekunder, mätning.antal, mätning.topp_byte)
+    
+    def stäng(self):
+        """
+        Stänger av tracemalloc om den här Profilen startade den
+        """
+        if self._startade_tracemalloc:
+            tracemalloc.stop()
+            self._startade_tracemalloc = False
+    
+    @property
+    def sekunder(self):
+        return sum(sekunder for sekunder, _, _ in self._mätningar.values())
+    
+    @classmethod
+    def slå_ihop(cls, profiler):
+        """
+        En Profil med summan av flera
+        """
+        summa = None
+        for profil in profiler:
+            if profil is None:
+                continue
+            if summa is None:
+                summa = profil.ny()
+            summa.lägg_in(profil)
+        return summa
+
+
+class _IngenProfil:
+    # Används när ingen Profil anges, så att stegen kan markeras utan villkor
+    minne = False
+    
+    def steg(self, namn, antal=0):
+        return nullcontext(self)
+    
+    def räkna(self, namn, antal):
+        pass
+    
+    def iterera(self, namn, iterator):
+        return iterator
+    
+    def stäng(self):
+        pass
+
+
+INGEN_PROFIL = _IngenProfil()
@@ -0,0 +1,158 @@
+import re
+import unicodedata
+from array import array
+
+import numpy as np
+
+_ORD = re.compile(r"\w+")
+# Fraser inom citattecken, ord och OR/ELLER mellan dem
+_FRÅGEDEL = re.compile(r'"([^"]*)"?|(\S+)')
+_ELLER = {"OR", "ELLER"}
+
+
+def tokenisera(text):
+    """
+    Delar upp en text i ord. Texten NFC-normaliseras och casefoldas så att
+    å, ä och ö matchar oavsett hur de är kodade och oavsett versaler.
+    """
+    if not isinstance(text, str):
+        return []
+    return _ORD.findall(unicodedata.normalize("NFC", text).casefold())
+
+
+class Sökindex:
+    """
+    Inverterat index över rubrik och text: ord -> artiklar, med ordens
+    positioner så att frassökningar kan besvaras utan att läsa texterna.
+    
+    Postningarna lagras i kompakta arrayer: artikelnummer, var artikelns
+    positioner börjar, och positionerna själva.
+    
+    Frågesyntax (samma som i sökrutan):
+    - ord som står efter varandra måste alla finnas (AND)
+    - OR eller ELLER mellan delar ger träff på någon av dem
+    - "citattecken" söker efter exakt fras
+    - ett ord utan citattecken matchar alla ord som innehåller det, så att
+      "klimat" hittar både "klimatförändringar" och "världsklimatet"
+    """
+    
+    def __init__(self, rubriker, texter):
+        poster = {}
+        antal = 0
+        for nr, (rubrik, text) in enumerate(zip(rubriker, texter)):
+            # Ett tomt steg mellan rubrik och text så att fraser inte går över gränsen
+            ord_ = tokenisera(rubrik)
+            start = len(ord_) + 1
+            positioner = {}
+            for pos, o in enumerate(ord_):
+                positioner.setdefault(o, []).append(pos)
+            for pos, o in enumerate(tokenisera(text), start):
+                positioner.setdefault(o, []).append(pos)
+            
+            for o, pos in positioner.items():
+                post = poster.get(o)
+                if post is None:
+                    post = poster[o] = (array("I"), array("I", [0]), array("I"))
+                post[0].append(nr)
+                post[2].extend(pos)
+                post[1].append(len(post[2]))
+            antal = nr + 1
+        
+        self.antal_artiklar = antal
+        self._poster = poster
+        self._ordlista = sorted(poster)
+        # Ordlistan som en enda sträng, för delordssökning med str.find
+        self._ordtext = "\n".join(self._ordlista)
+    
+    @classmethod
+    def från_dataframe(cls, df):
+        return cls(df["rubrik"], df["text"])
+    
+    def __len__(self):
+        return len(self._ordlista)
+    
+    def _artiklar(self, o):
+        post = self._poster.get(o)
+        if post is None:
+            return np.empty(0, dtype=np.uint32)
+        return np.frombuffer(post[0], dtype=np.uint32)
+    
+    def _delord(self, delord):
+        # Alla ord i ordlistan som innehåller delordet, även mitt i ett sammansatt ord
+        ordtext = self._ordtext
+        träffar = []
+        pos = ordtext.find(delord)
+        while pos != -1:
+            start = ordtext.rfind("\n", 0, pos) + 1
+            slut = ordtext.find("\n", pos)
+            if slut == -1:
+                slut = len(ordtext)
+            träffar.append(self._artiklar(ordtext[start:slut]))
+            pos = ordtext.find(delord, slut)
+        if not träffar:
+            return np.empty(0, dtype=np.uint32)
+        if len(träffar) == 1:
+            return träffar[0]
+        return np.unique(np.concatenate(träffar))
+    
+    def _förekomster(self, o):
+        # Varje förekomst som artikelnummer << 32 | position, stigande
+        post = self._poster.get(o)
+        if post is None:
+            return np.empty(0, dtype=np.uint64)
+        dokument = np.frombuffer(post[0], dtype=np.uint32).astype(np.uint64)
+        antal = np.diff(np.frombuffer(post[1], dtype=np.uint32))
+        positioner = np.frombuffer(post[2], dtype=np.uint32).astype(np.uint64)
+        return (np.repeat(dokument, antal) << np.uint64(32)) | positioner
+    
+    def _fras(self, ord_):
+        # Frasen finns där ord nummer k står k steg efter det första ordet
+        starter = self._förekomster(ord_[0])
+        for steg, o in enumerate(ord_[1:], 1):
+            if not len(starter):
+                break
+            starter = np.intersect1d(starter, self._förekomster(o) - np.uint64(steg), assume_unique=True)
+        return np.unique((starter >> np.uint64(32)).astype(np.uint32))
+    
+    def _del(self, fras, ord_):
+        delar = tokenisera(fras if fras is not None else ord_)
+        if not delar:
+            return None
+        if fras is None and len(delar) == 1:
+            return self._delord(delar[0])
+        # Ett ord som delas upp av skiljetecken (t.ex. "co2-utsläpp") söks som fras
+        return self._fras(delar)
+    
+    def sök(self, fråga):
+        """
+        Returnerar de matchande artiklarnas radnummer, sorterade
+        """
+        grupper = []
+        grupp = None
+        for träff in _FRÅGEDEL.finditer(fråga):
+            fras, ord_ = träff.groups()
+            if fras is None and ord_ in _ELLER:
+                if grupp is not None:
+                    grupper.append(grupp)
+                grupp = None
+                continue
+            artiklar = self._del(fras, ord_)
+            if artiklar is None:
+                continue
+            grupp = artiklar if grupp is None else np.intersect1d(grupp, artiklar, assume_unique=True)
+        if grupp is not None:
+            grupper.append(grupp)
+        
+        if not grupper:
+            return np.empty(0, dtype=np.intp)
+        if len(grupper) == 1:
+            return grupper[0].astype(np.intp)
+        return np.unique(np.concatenate(grupper)).astype(np.intp)
+    
+    def mask(self, fråga):
+        """
+        Boolesk mask med en rad per artikel, för att filtrera en DataFrame
+        """
+        mask = np.zeros(self.antal_artiklar, dtype=bool)
+        mask[self.sök(fråga)] = True
+        return mask
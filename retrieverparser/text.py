@@ -0,0 +1,755 @@
+import re
+import codecs
+import mmap
+import multiprocessing
+import os
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from io import BytesIO
+from itertools import chain
+
+from .dubbletter import Dubblettfilter
+from .profil import INGEN_PROFIL
+
+# Förkompilerade mönster som delas av alla format
+_METADATA = re.compile(r"Linnéuniversitetet.+|Datum\s.+|Nyheter:")
+_SEPARATOR = re.compile(r"=+\s*$")
+_LÄNK = re.compile(r"http://ret\.nu/\w+")
+_TIDNING_DATUM = re.compile(r"\n(.+,\s\d+-\d+-\d+)")
+_SIDA = re.compile(r"Sida\s\d.+")
+
+# Mönster som bryter texten i artiklar
+# Modernt Retriever-format (med "Alla artiklar" prefix)
+_ALLA_ARTIKLAR = re.compile(r"Alla artiklar.*?Läs hela artikeln på\s+http://ret\.nu/\w+\s*\n=+\s*\n+", re.DOTALL)
+# Alternativt mönster för Se webartikeln
+_SE_WEBARTIKELN = re.compile(r"Se webartikeln på\s+http://ret\.nu/\w+\s*\n=+\s*\n+", re.DOTALL)
+# Äldre mönster (för bakåtkompatibilitet med andra format)
+_COPYRIGHT_LÄS = re.compile(r"©.+\n\nLäs hela.+\n=+\n\n")
+_COPYRIGHT_WEBB = re.compile(r"©.+\n\nSe webartikeln på.+\n=+\n\n")
+
+# Ett exportformat: namn, kännetecken att leta efter i filens början och
+# mönster som avslutar en artikel. Mönstren täcker hela fotnoten fram till
+# separatorn och används både av retrieverrens och vid strömmande läsning.
+Retrieverformat = namedtuple("Retrieverformat", ["namn", "kännetecken", "artikelslut"])
+
+# Registret över kända format, i den ordning de provas vid identifiering
+FORMAT = {
+    "modern": Retrieverformat(
+        "modern",
+        re.compile(r"Alla artiklar"),
+        (_ALLA_ARTIKLAR, _SE_WEBARTIKELN),
+    ),
+    "äldre": Retrieverformat(
+        "äldre",
+        re.compile(r"©.+\n\n(?:Läs hela|Se webartikeln på)"),
+        (_COPYRIGHT_LÄS, _COPYRIGHT_WEBB),
+    ),
+    "webbartikel": Retrieverformat(
+        "webbartikel",
+        re.compile(r"Se webartikeln på\s+http://ret\.nu/"),
+        (_SE_WEBARTIKELN,),
+    ),
+}
+
+# Exporter blandar ofta webbartikel- och "Alla artiklar"-fotnoter. En fil som
+# börjar med webbartiklar läses därför med båda mönstren, om inte provet är
+# hela filen och alltså visar att "Alla artiklar" aldrig förekommer.
+_WEBBARTIKEL_BLANDAD = FORMAT["modern"]._replace(
+    namn="webbartikel", kännetecken=FORMAT["webbartikel"].kännetecken
+)
+
+# Används när inget känt format hittas: prova alla mönster som tidigare
+OKÄNT_FORMAT = Retrieverformat(
+    "okänt",
+    None,
+    (_ALLA_ARTIKLAR, _SE_WEBARTIKELN, _COPYRIGHT_LÄS, _COPYRIGHT_WEBB),
+)
+
+# Hur mycket av början av filen som används för att känna igen formatet
+SNIFF_TECKEN = 8192
+
+# Hur många byte som avkodas åt gången vid strömmande inläsning
+AVKODNING_BITSTORLEK = 1 << 20
+
+# Höjs när parsningen ändras så att cachade resultat blir ogiltiga
+PARSER_VERSION = 4
+
+# Kolumnerna i en parsad korpus
+KOLUMNER = ["rubrik", "tidning", "datum", "sida", "text", "länk"]
+
+# En artikel som post, gemensam för text- och PDF-parsern. Namedtuplen har inga
+# instansdictar, och pandas behövs inte förrän någon ber om en DataFrame.
+# Författare finns bara i PDF-exporterna; source_file sätts av läs_artiklar.
+Artikel = namedtuple("Artikel", KOLUMNER + ["författare", "source_file"], defaults=("", ""))
+
+
+def identifiera_format(början, hela=False):
+    """
+    Känner igen exportformatet utifrån de första tecknen i en fil. `hela`
+    anger att `början` är hela filen.
+    """
+    början = början.replace('\r\n', '\n').replace('\r', '\n')
+    for filformat in FORMAT.values():
+        if filformat.kännetecken.search(början):
+            if filformat.namn == "webbartikel" and not hela:
+                return _WEBBARTIKEL_BLANDAD
+            return filformat
+    return OKÄNT_FORMAT
+
+
+def _sniffa(rader):
+    """
+    Känner igen formatet från de första raderna. Returnerar formatet och
+    en iterator som fortfarande ger alla rader.
+    """
+    rader = iter(rader)
+    början = []
+    antal_tecken = 0
+    for rad in rader:
+        början.append(rad)
+        antal_tecken += len(rad)
+        if antal_tecken >= SNIFF_TECKEN:
+            return identifiera_format("".join(början)), chain(början, rader)
+    return identifiera_format("".join(början), hela=True), iter(början)
+
+
+def _artikelfält(item, länk):
+    """
+    Plockar ut rubrik, tidning, datum, sida och text ur en enskild artikel
+    """
+    # Extrahera tidningstitel och datum
+    datum = _TIDNING_DATUM.findall(item)
+    sidor = _SIDA.findall(item)
+    
+    if len(sidor) > 0:
+        sidor = sidor[0]
+        item = item.replace(sidor, "")
+    else:
+        sidor = ""
+    
+    rentextrader = item.split("\n")
+    rubrik = rentextrader[0]
+    rentext = " ".join(rentextrader[3:])
+    rentext = rentext.replace("Publicerat i print.", "")
+    
+    if len(datum) == 0:
+        tiddat = ["NA"]
+    else:
+        tiddat = datum[0].strip().split(",")
+    if len(tiddat) > 2:
+        tiddat = [tiddat[0] + tiddat[1], tiddat[2]]
+    
+    return Artikel(
+        rubrik=rubrik,
+        tidning=tiddat[0] if len(tiddat) > 0 else "",
+        datum=tiddat[1] if len(tiddat) > 1 else "",
+        sida=sidor.strip("Sida "),
+        text=rentext,
+        länk=länk
+    )
+
+
+def retrieverrens_iter(fil, filformat=None, profil=INGEN_PROFIL):
+    """
+    Generator som läser en Retriever-export rad för rad och ger en Artikel i taget.
+    
+    `fil` är ett filliknande objekt i textläge (eller någon annan iterator över rader).
+    Varje artikel får sin egen länk, och minnesåtgången begränsas av den största
+    artikeln i stället för hela korpusen. Om `filformat` saknas identifieras det
+    från filens första rader. Med en Profil mäts fältextraktionen för sig.
+    """
+    if filformat is None:
+        filformat, fil = _sniffa(fil)
+    
+    rader = []
+    
+    for rad in fil:
+        rad = rad.rstrip("\r\n")
+        rad = _METADATA.sub("", rad).replace("|", "")
+        
+        # Separatorraden avslutar artikeln
+        if _SEPARATOR.match(rad):
+            artikel = _avsluta_artikel(rader, filformat, rad, profil)
+            if artikel:
+                yield artikel
+            rader = []
+            continue
+        
+        rader.append(rad)
+    
+    # Sista artikeln saknar ibland avslutande separator
+    artikel = _avsluta_artikel(rader, filformat, profil=profil)
+    if artikel:
+        yield artikel
+
+
+def _avsluta_artikel(rader, filformat, separator="=", profil=INGEN_PROFIL):
+    """
+    Bygger en artikel av de insamlade raderna, eller None om de bara är tomrader
+    
+    Fotnoten kapas bara när hela blocket framför separatorn har formatets form,
+    med samma artikelslutsmönster som retrieverrens använder. Ett "©" eller
+    "Läs hela" i brödtexten räcker alltså inte.
+    """
+    länk = ""
+    text = "\n".join(rader) + "\n" + separator + "\n\n"
+    for mönster in filformat.artikelslut:
+        träff = mönster.search(text)
+        if träff:
+            länk = _LÄNK.search(text, träff.start())
+            länk = länk.group() if länk else ""
+            rader = text[:träff.start()].split("\n")
+            if not rader[-1].strip():
+                rader.pop()
+            break
+    
+    start = 0
+    while start < len(rader) and not rader[start].strip():
+        start += 1
+    if start == len(rader) and not länk:
+        return None
+    with profil.steg("fältextraktion", 1):
+        return _artikelfält("\n".join(rader[start:]), länk)
+
+
+def identifiera_kodning(början):
+    """
+    Känner igen kodningen från BOM, eller utan BOM från andelen nollbyte
+    (UTF-16 har en nollbyte i vartannat tecken för latinsk text)
+    """
+    if början.startswith(codecs.BOM_UTF8):
+        return "utf-8-sig"
+    if början.startswith((codecs.BOM_UTF16_LE, codecs.BOM_UTF16_BE)):
+        return "utf-16"
+    prov = början[:SNIFF_TECKEN]
+    if prov.count(0) > len(prov) // 4:
+        return "utf-16-le" if prov[1::2].count(0) >= prov[0::2].count(0) else "utf-16-be"
+    return "utf-8"
+
+
+def avkoda_strömmande(fil, bitstorlek=AVKODNING_BITSTORLEK):
+    """
+    Avkodar en binär fil bit för bit med en inkrementell avkodare.
+    
+    Kodningen känns igen från den första biten. Returnerar kodningen och en
+    generator med textbitar, så att hela filen aldrig finns avkodad samtidigt.
+    """
+    första = fil.read(bitstorlek)
+    kodning = identifiera_kodning(första)
+    
+    def bitar(bit):
+        avkodare = codecs.getincrementaldecoder(kodning)()
+        while bit:
+            yield avkodare.decode(bit)
+            bit = fil.read(bitstorlek)
+        yield avkodare.decode(b"", final=True)
+    
+    return kodning, bitar(första)
+
+
+def rader(bitar):
+    """
+    Delar upp en ström av textbitar i rader (med radslut kvar)
+    """
+    rest = ""
+    for bit in bitar:
+        rest += bit
+        delar = rest.split("\n")
+        rest = delar.pop()
+        for del_ in delar:
+            yield del_ + "\n"
+    if rest:
+        yield rest
+
+
+def _artiklar_fil(fil, profil=INGEN_PROFIL):
+    """
+    Avkodar en binär Retriever-fil strömmande och känner igen kodning och
+    format. Returnerar (kodning, format, generator med Artikel-poster).
+    """
+    kodning, bitar = avkoda_strömmande(fil)
+    bitar = profil.iterera("avkodning", bitar)
+    filformat, radström = _sniffa(rader(bitar))
+    artiklar = retrieverrens_iter(radström, filformat, profil)
+    return kodning, filformat, profil.iterera("rensning och uppdelning", artiklar)
+
+
+def till_dataframe(artiklar, kolumner=None):
+    """
+    Bygger en DataFrame av Artikel-poster, med postens fält som kolumner
+    (eller bara `kolumner`). Det är först här som pandas importeras.
+    """
+    import pandas as pd
+    
+    utan = [fält for fält in Artikel._fields if kolumner is not None and fält not in kolumner]
+    artikelpd = pd.DataFrame.from_records(list(artiklar), columns=Artikel._fields, exclude=utan)
+    return artikelpd if kolumner is None else artikelpd[list(kolumner)]
+
+
+def läs_artiklar(källa, namn=None, dubblettfilter=None, pdfmotor=None):
+    """
+    Generator med Artikel-poster ur en Retriever-export, utan att pandas importeras.
+    
+    `källa` är en sökväg, byte eller en binär fil. PDF-exporter känns igen på
+    filhuvudet och läses med PDF-parsern (med `pdfmotor` som textextraktion,
+    en av PDF_BACKENDS), allt annat som textexport. Varje post får `namn`
+    (eller sökvägens filnamn) som source_file.
+    """
+    if isinstance(källa, (str, os.PathLike)):
+        with open(källa, "rb") as fil:
+            yield from läs_artiklar(fil, namn or os.path.basename(källa), dubblettfilter, pdfmotor)
+        return
+    if isinstance(källa, (bytes, bytearray, memoryview)):
+        källa = BytesIO(källa)
+    
+    början = källa.read(4)
+    källa.seek(-len(början), 1)
+    if början == b"%PDF":
+        from .pdf import iter_retriever_pdf
+        artiklar = iter_retriever_pdf(källa) if pdfmotor is None else iter_retriever_pdf(källa, backend=pdfmotor)
+    else:
+        _, _, artiklar = _artiklar_fil(källa)
+    
+    if dubblettfilter is not None:
+        artiklar = dubblettfilter.filtrera(artiklar)
+    for artikel in artiklar:
+        yield artikel._replace(source_file=namn or "")
+
+
+def retrieverrens_fil(fil, dubblettfilter=None, profil=INGEN_PROFIL):
+    """
+    Parsar en binär Retriever-fil strömmande: avkodar i bitar, känner igen
+    kodning och format och bygger en DataFrame artikel för artikel.
+    
+    Med ett Dubblettfilter tas dubbletter bort innan de hamnar i DataFrame:n.
+    Kodningen, formatet och antalet borttagna dubbletter sparas i
+    `df.attrs["kodning"]`, `df.attrs["format"]` och `df.attrs["dubbletter"]`.
+    Med en Profil mäts avkodning, rensning och uppdelning, fältextraktion,
+    dubblettfiltrering och bygget av DataFrame:n var för sig.
+    """
+    kodning, filformat, artiklar = _artiklar_fil(fil, profil)
+    
+    borttagna = 0
+    if dubblettfilter is not None:
+        borttagna = dubblettfilter.borttagna
+        artiklar = profil.iterera("dubblettfilter", dubblettfilter.filtrera(artiklar))
+    
+    artiklar = list(artiklar)
+    with profil.steg("DataFrame", len(artiklar)):
+        artikelpd = till_dataframe(artiklar, KOLUMNER)
+    artikelpd.attrs["format"] = filformat.namn
+    artikelpd.attrs["kodning"] = kodning
+    if dubblettfilter is not None:
+        borttagna = dubblettfilter.borttagna - borttagna
+    artikelpd.attrs["dubbletter"] = borttagna
+    return artikelpd
+
+
+def retrieverrens(text, filformat=None, typad=False, profil=INGEN_PROFIL):
+    """
+    Funktion som rensar retriever-nedladdningar (formatet ska vara utf-16)
+    
+    Exportformatet identifieras från textens början om `filformat` inte anges
+    och sparas i `df.attrs["format"]`. Med `typad` får kolumnerna kompakta
+    typer (se typa_kolumner). Med en Profil mäts rensning, uppdelning,
+    fältextraktion och bygget av DataFrame:n var för sig.
+    """
+    import pandas as pd
+    
+    with profil.steg("rensning"):
+        # KRITISKT: Normalisera radbrytningar först!
+        # Retriever-filer använder Windows-format (CRLF) som måste konverteras
+        text = text.replace('\r\n', '\n').replace('\r', '\n')
+        
+        if filformat is None:
+            filformat = identifiera_format(text[:SNIFF_TECKEN], hela=len(text) <= SNIFF_TECKEN)
+        
+        # Rensa bort metadata
+        text = _METADATA.sub("", text)
+        text = text.strip("\n")
+        
+        # Ta bort från originaltexten det som senare blir markör mellan artiklar
+        text = text.replace("|", "")
+        
+        # Samla ihop alla länkar till originalartiklar
+        länkar = _LÄNK.findall(text)
+    
+    with profil.steg("uppdelning"):
+        # Bryt texten i artiklar med formatets egna mönster
+        for mönster in filformat.artikelslut:
+            text = mönster.sub("|", text)
+        
+        # Plocka ut fälten kolumnvis för alla artiklar på en gång
+        artiklar = pd.Series(text.split("|"))
+    
+    with profil.steg("fältextraktion", len(artiklar)):
+        # Extrahera tidningstitel och datum
+        tiddat = artiklar.str.extract(_TIDNING_DATUM, expand=False).str.strip().fillna("NA")
+        sidor = artiklar.str.extract(f"({_SIDA.pattern})", expand=False).fillna("")
+        
+        # Sidraden tas bort ur texten innan den delas upp i rader
+        artiklar = artiklar.str.replace(_SIDA, "", n=1, regex=True)
+        rentextrader = artiklar.str.split("\n", n=3, expand=True).reindex(columns=range(4))
+        rentext = (
+            rentextrader[3].fillna("")
+            .str.replace("\n", " ", regex=False)
+            .str.replace("Publicerat i print.", "", regex=False)
+        )
+        
+        # "Tidning, datum" - med tre delar hör de två första till tidningsnamnet
+        tiddat = tiddat.str.split(",", expand=True).reindex(columns=range(3))
+        tre_delar = tiddat[2].notna()
+        # Kolumner som saknas helt blir NaN (float) och kan inte läggas ihop med text
+        tiddat = tiddat.fillna("")
+        tidning = tiddat[0].where(~tre_delar, tiddat[0] + tiddat[1])
+        datum = tiddat[1].where(~tre_delar, tiddat[2])
+        
+        # Länkarna kopplas till artiklarna i tur och ordning
+        länkar = länkar[:len(artiklar)] + [""] * (len(artiklar) - len(länkar))
+    
+    with profil.steg("DataFrame", len(artiklar)):
+        artikelpd = pd.DataFrame({
+            "rubrik": rentextrader[0],
+            "tidning": tidning,
+            "datum": datum,
+            "sida": sidor.str.strip("Sida "),
+            "text": rentext,
+            "länk": länkar
+        })
+    if typad:
+        with profil.steg("typning", len(artikelpd)):
+            artikelpd = typa_kolumner(artikelpd)
+    artikelpd.attrs["format"] = filformat.namn
+    return artikelpd
+
+
+# Hur många byte av varje artikel som avkodas direkt för rubrik, tidning och datum
+INDEX_HUVUD_BYTE = 2048
+
+
+class IndexeradArtikel:
+    """
+    En artikel i ett Artikelindex. Rubrik, tidning, datum, sida och länk avkodas
+    direkt, medan brödtexten avkodas först när `text` läses.
+    """
+    __slots__ = ("_index", "offset", "längd", "rubrik", "tidning", "datum", "sida", "länk")
+    
+    def __init__(self, index, offset, längd, fält):
+        self._index = index
+        self.offset = offset
+        self.längd = längd
+        self.rubrik = fält.rubrik
+        self.tidning = fält.tidning
+        self.datum = fält.datum
+        self.sida = fält.sida
+        self.länk = fält.länk
+    
+    @property
+    def text(self):
+        return self._index._materialisera(self).text
+    
+    def som_artikel(self):
+        return self._index._materialisera(self)
+    
+    def som_dict(self):
+        return dict(zip(KOLUMNER, self.som_artikel()))
+
+
+class Artikelindex:
+    """
+    Index över artiklarna i en Retriever-export som bygger på råa byte.
+    
+    Separatorraderna (=====) och ret.nu-länkarna letas upp direkt i bufferten
+    (bytes eller mmap) och varje artikel sparas som ett (offset, längd)-spann.
+    Hela filen avkodas aldrig på en gång. Byte som inte går att avkoda ger
+    UnicodeDecodeError, och en fil utan separatorer i ett okänt format ger
+    ValueError, precis som vid strömmande parsning.
+    """
+    
+    def __init__(self, buffert):
+        self._buffert = buffert
+        self._mmap = None
+        
+        # Känn igen kodningen från BOM (Retriever exporterar normalt UTF-16)
+        början = bytes(buffert[:4])
+        if början.startswith(codecs.BOM_UTF16_LE):
+            self.kodning, self._start, self._bredd = "utf-16-le", 2, 2
+        elif början.startswith(codecs.BOM_UTF16_BE):
+            self.kodning, self._start, self._bredd = "utf-16-be", 2, 2
+        elif början.startswith(codecs.BOM_UTF8):
+            self.kodning, self._start, self._bredd = "utf-8", 3, 1
+        elif len(början) >= 2 and början[1:2] == b"\x00":
+            self.kodning, self._start, self._bredd = "utf-16-le", 0, 2
+        else:
+            self.kodning, self._start, self._bredd = "utf-8", 0, 1
+        
+        hela = self._start + SNIFF_TECKEN * self._bredd >= len(buffert)
+        huvud = self._avkoda(self._start, SNIFF_TECKEN * self._bredd, avklippt=not hela)
+        self.format = identifiera_format(huvud, hela=hela)
+        
+        self.spann = []
+        self.artiklar = []
+        self._indexera()
+    
+    @classmethod
+    def öppna(cls, sökväg):
+        """
+        Minnesmappar en exportfil och indexerar den
+        """
+        with open(sökväg, "rb") as f:
+            mappning = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        index = cls(mappning)
+        index._mmap = mappning
+        return index
+    
+    def stäng(self):
+        if self._mmap is not None:
+            self._mmap.close()
+            self._mmap = None
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc):
+        self.stäng()
+    
+    def __len__(self):
+        return len(self.artiklar)
+    
+    def __getitem__(self, nr):
+        return self.artiklar[nr]
+    
+    def __iter__(self):
+        return iter(self.artiklar)
+    
+    def _avkoda(self, offset, längd, avklippt=False):
+        if not avklippt:
+            return bytes(self._buffert[offset:offset + längd]).decode(self.kodning)
+        # Ett fönster kan klippa av sista tecknet: håll längden jämn så att
+        # UTF-16-tecken inte delas, och lämna bara en ofullständig sekvens på
+        # slutet kvar; allt annat avkodas strikt
+        längd -= längd % self._bredd
+        return codecs.getincrementaldecoder(self.kodning)().decode(bytes(self._buffert[offset:offset + längd]))
+    
+    def _hitta(self, mönster, start, slut):
+        # Sök i råa byte men godta bara träffar som ligger på teckengräns
+        pos = self._buffert.find(mönster, start, slut)
+        while pos != -1 and (pos - self._start) % self._bredd:
+            pos = self._buffert.find(mönster, pos + 1, slut)
+        return pos
+    
+    def _indexera(self):
+        separator = "\n=====".encode(self.kodning)
+        radslut = "\n".encode(self.kodning)
+        länkstart = "http://ret.nu/".encode(self.kodning)
+        storlek = len(self._buffert)
+        
+        start = self._start
+        while start < storlek:
+            pos = self._hitta(separator, start, storlek)
+            slut = storlek if pos == -1 else pos
+            
+            if pos == -1 and start == self._start and self.format is OKÄNT_FORMAT:
+                raise ValueError("ingen artikelseparator och inget känt Retriever-format")
+            
+            huvud = self._avkoda(start, min(slut - start, INDEX_HUVUD_BYTE), avklippt=slut - start > INDEX_HUVUD_BYTE)
+            if huvud.strip():
+                länk = ""
+                länkpos = self._hitta(länkstart, start, slut)
+                if länkpos != -1:
+                    träff = _LÄNK.match(self._avkoda(länkpos, min(slut - länkpos, 64 * self._bredd), avklippt=True))
+                    if träff:
+                        länk = träff.group()
+                
+                fält = self._fält(huvud, länk)
+                if fält is not None:
+                    self.spann.append((start, slut - start))
+                    self.artiklar.append(IndexeradArtikel(self, start, slut - start, fält))
+            
+            if pos == -1:
+                break
+            # Nästa artikel börjar efter separatorraden
+            radslutpos = self._hitta(radslut, pos + len(separator), storlek)
+            start = storlek if radslutpos == -1 else radslutpos + len(radslut)
+    
+    def _fält(self, text, länk):
+        artikel = next(retrieverrens_iter(text.splitlines(), self.format), None)
+        if artikel is not None:
+            artikel = artikel._replace(länk=länk)
+        return artikel
+    
+    def _materialisera(self, artikel):
+        return self._fält(self._avkoda(artikel.offset, artikel.längd), artikel.länk)
+    
+    def till_dataframe(self, med_text=True, dubblettfilter=None):
+        """
+        Bygger en DataFrame med samma kolumner som retrieverrens. Utan text
+        avkodas bara de redan inlästa metadatafälten. Med ett Dubblettfilter
+        hoppas dubbletter över innan deras text avkodas.
+        """
+        artiklar = self.artiklar
+        borttagna = 0
+        if dubblettfilter is not None:
+            borttagna = dubblettfilter.borttagna
+            artiklar = [
+                artikel for artikel in artiklar
+                if dubblettfilter.är_ny(artikel.länk, artikel.rubrik, artikel.tidning, artikel.datum)
+            ]
+            borttagna = dubblettfilter.borttagna - borttagna
+        
+        if med_text:
+            artikelpd = till_dataframe((artikel.som_artikel() for artikel in artiklar), KOLUMNER)
+        else:
+            artikelpd = till_dataframe(
+                (Artikel(artikel.rubrik, artikel.tidning, artikel.datum, artikel.sida, "", artikel.länk)
+                 for artikel in artiklar),
+                [kolumn for kolumn in KOLUMNER if kolumn != "text"]
+            )
+        artikelpd.attrs["format"] = self.format.namn
+        artikelpd.attrs["dubbletter"] = borttagna
+        return artikelpd
+
+
+# Resultatet av att parsa en fil: filnamn, artiklar, kodning, ev. felmeddelande
+# och, om parsningen profilerades, dess Profil
+Filresultat = namedtuple("Filresultat", ["namn", "df", "kodning", "fel", "profil"], defaults=(None,))
+
+
+def parsa_fil(namn, data, indexera=False, deduplicera=False, profil=None):
+    """
+    Avkodar och parsar en enskild uppladdad fil. Fel fångas och returneras
+    så att en trasig fil inte påverkar de andra. Med `deduplicera` tas
+    dubbletter inom filen bort medan den parsas. En Profil fylls i med
+    stegens mätningar och följer med i resultatet.
+    """
+    dubblettfilter = Dubblettfilter() if deduplicera else None
+    mätning = profil if profil is not None else INGEN_PROFIL
+    try:
+        if indexera:
+            with mätning.steg("indexering"):
+                index = Artikelindex(data)
+            mätning.räkna("indexering", len(index))
+            with mätning.steg("DataFrame", len(index)):
+                artikelpd = index.till_dataframe(dubblettfilter=dubblettfilter)
+            artikelpd.attrs["kodning"] = index.kodning
+        else:
+            artikelpd = retrieverrens_fil(BytesIO(data), dubblettfilter=dubblettfilter, profil=mätning)
+        artikelpd["source_file"] = namn
+        return Filresultat(namn, artikelpd, artikelpd.attrs["kodning"], None, profil)
+    except Exception as e:
+        return Filresultat(namn, None, None, str(e), profil)
+    finally:
+        mätning.stäng()
+
+
+def arbetspool(max_workers=None):
+    """
+    Processpool för parsning i flera processer
+    
+    Processerna startas med spawn i stället för fork: Streamlit-servern har
+    trådar, och en forkad process kan ärva ett lås som någon av dem höll.
+    Det som skickas till poolen måste därför gå att importera och pickla.
+    """
+    return ProcessPoolExecutor(max_workers=max_workers, mp_context=multiprocessing.get_context("spawn"))
+
+
+def parsa_filer(filer, indexera=False, max_workers=None, deduplicera=False, profil=None):
+    """
+    Parsar flera filer, var och en i en egen process. `filer` är en lista med
+    (namn, byte)-par. Resultaten kommer i samma ordning som filerna. Med en
+    Profil får varje fil en egen (i resultatet) och summan läggs in i `profil`.
+    """
+    profiler = [profil.ny() if profil is not None else None for _ in filer]
+    
+    if len(filer) <= 1 or max_workers == 1:
+        resultat = [
+            parsa_fil(namn, data, indexera, deduplicera, filprofil)
+            for (namn, data), filprofil in zip(filer, profiler)
+        ]
+    else:
+        with arbetspool(max_workers) as pool:
+            framtider = [
+                pool.submit(parsa_fil, namn, data, indexera, deduplicera, filprofil)
+                for (namn, data), filprofil in zip(filer, profiler)
+            ]
+            resultat = [framtid.result() for framtid in framtider]
+    
+    if profil is not None:
+        for r in resultat:
+            profil.lägg_in(r.profil)
+    return resultat
+
+
+def _textdtype():
+    # Arrow-baserade strängar om pyarrow finns, annars pandas egna
+    import pandas as pd
+    
+    try:
+        import pyarrow  # noqa: F401
+        return pd.StringDtype("pyarrow")
+    except ImportError:
+        return pd.StringDtype()
+
+
+def typa_kolumner(artikelpd):
+    """
+    Returnerar en kompakt typad kopia av en parsad korpus:
+    tidning och source_file som kategorier, datum som datetime64 (ogiltiga
+    datum blir NaT), sida som litet heltal om alla sidor är heltal, och
+    textkolumnerna som Arrow-baserade strängar.
+    """
+    import pandas as pd
+    
+    typad = artikelpd.copy(deep=False)
+    textdtype = _textdtype()
+    
+    for kolumn in ("rubrik", "text", "länk"):
+        if kolumn in typad:
+            typad[kolumn] = typad[kolumn].astype(textdtype)
+    for kolumn in ("tidning", "source_file"):
+        if kolumn in typad:
+            typad[kolumn] = typad[kolumn].astype("category")
+    
+    if "datum" in typad:
+        typad["datum"] = pd.to_datetime(
+            typad["datum"].astype(textdtype).str.strip(), format="%Y-%m-%d", errors="coerce"
+        )
+    
+    if "sida" in typad:
+        sida = typad["sida"].astype(textdtype).str.strip()
+        tal = pd.to_numeric(sida.mask(sida == ""), errors="coerce")
+        # Sidor som "10#11" går inte att göra om till tal och behålls som text
+        if (tal.notna() | sida.isna() | (sida == "")).all() and (tal.dropna() % 1 == 0).all():
+            största = tal.abs().max() if tal.notna().any() else 0
+            typad["sida"] = tal.astype("Int16" if största < 2 ** 15 else "Int32")
+        else:
+            typad["sida"] = sida
+    
+    return typad
+
+
+def sammanfoga(resultat, deduplicera=False, typad=False):
+    """
+    Slår ihop de lyckade filernas artiklar till en DataFrame. Med `deduplicera`
+    tas artiklar som redan fanns i en tidigare fil bort, och det totala antalet
+    borttagna dubbletter sparas i `df.attrs["dubbletter"]`. Med `typad` får
+    kolumnerna kompakta typer (se typa_kolumner).
+    """
+    import pandas as pd
+    
+    delar = [r.df for r in resultat if r.df is not None]
+    borttagna = sum(df.attrs.get("dubbletter", 0) for df in delar)
+    
+    if deduplicera:
+        dubblettfilter = Dubblettfilter()
+        delar = [dubblettfilter.filtrera_df(df) for df in delar]
+        borttagna += dubblettfilter.borttagna
+    
+    if not delar:
+        artikelpd = pd.DataFrame(columns=KOLUMNER + ["source_file"])
+    else:
+        artikelpd = pd.concat(delar, ignore_index=True)
+    if typad:
+        artikelpd = typa_kolumner(artikelpd)
+    artikelpd.attrs = {"dubbletter": borttagna}
+    return artikelpd
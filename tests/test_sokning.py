@@ -0,0 +1,49 @@
+import pandas as pd
+import pytest
+
+from retrieverparser import Sökindex, tokenisera
+
+ARTIKLAR = pd.DataFrame({
+    "rubrik": ["Klimatet i fokus", "Världsklimatet förändras", "Valet närmar sig", "Skolan", "ÅRETS bästa"],
+    "text": [
+        "Regeringen presenterade en ny plan.",
+        "Forskare varnar för stigande temperaturer.",
+        "Partierna debatterade skolan och klimatet.",
+        "Elever och lärare om co2-utsläpp.",
+        "Årets bok handlar om klimat.",
+    ],
+})
+
+
+@pytest.fixture(scope="module")
+def index():
+    return Sökindex.från_dataframe(ARTIKLAR)
+
+
+@pytest.mark.parametrize("fråga, väntat", [
+    ("klimat", [0, 1, 2, 4]),                  # även mitt i "världsklimatet"
+    ("förändr", [1]),                          # början av ett längre ord
+    ("klimatet skolan", [2]),                  # AND
+    ("valet OR skolan", [2, 3]),
+    ("valet ELLER skolan", [2, 3]),
+    ("regeringen OR skolan klimatet", [0, 2]), # AND binder hårdare än OR
+    ('"ny plan"', [0]),
+    ('"plan ny"', []),
+    ('"klimat"', [4]),                         # ord i fraser måste stämma exakt
+    ("co2-utsläpp", [3]),
+    ("årets", [4]),
+    ("finns inte", []),
+    ("", []),
+])
+def test_sök(index, fråga, väntat):
+    assert index.sök(fråga).tolist() == väntat
+
+
+def test_mask(index):
+    assert index.mask("skolan").tolist() == [False, False, True, True, False]
+
+
+def test_tokenisera_normaliserar():
+    # "å" som bokstav + kombinerande ring ska bli samma ord som förkomponerat "å"
+    assert tokenisera("ÅRETS Bok") == tokenisera("Årets bok") == ["årets", "bok"]
+    assert tokenisera(None) == []
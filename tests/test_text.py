@@ -0,0 +1,109 @@
+from io import BytesIO
+
+import pytest
+
+from retrieverparser import Artikelindex, parsa_fil, retrieverrens, retrieverrens_fil
+from retrieverparser.text import SNIFF_TECKEN
+
+HUVUD = "Linnéuniversitetet BIBSAM (Växjö)\nDatum 2024-01-28\n\nNyheter:\n\n"
+
+
+def artikel(nr, webb):
+    brödtext = " ".join(f"Mening {k} i artikel {nr}." for k in range(40))
+    huvud = f"Rubrik {nr}\nTidning {nr % 3}, 2024-01-{nr % 28 + 1:02d}\nSida {nr % 9 + 1}\n\n{brödtext}\n\n"
+    if webb:
+        fot = f"Se webartikeln på\nhttp://ret.nu/W{nr:04d}\n"
+    else:
+        fot = (
+            "Alla artiklar är skyddade av upphovsrättslagen och får inte sparas.\n"
+            f"Läs hela artikeln på\nhttp://ret.nu/A{nr:04d}\n"
+        )
+    return huvud + fot + "=" * 78 + "\n\n"
+
+
+def blandad_export(antal=32, webb_först=12):
+    # Bara webbartiklar i början, så att formatprovet inte ser "Alla artiklar"
+    text = HUVUD + "".join(artikel(nr, nr < webb_först or nr % 4 == 0) for nr in range(antal))
+    assert "Alla artiklar" not in text[:SNIFF_TECKEN]
+    return text
+
+
+def kontrollera(artikelpd, antal=32):
+    assert len(artikelpd) == antal
+    assert artikelpd["rubrik"].tolist() == [f"Rubrik {nr}" for nr in range(antal)]
+    assert (artikelpd["länk"] != "").all()
+    # Fotnoten efter sista separatorn har alltid följt med i retrieverrens
+    assert not artikelpd["text"].iloc[:-1].str.contains("Alla artiklar|Läs hela artikeln").any()
+
+
+def test_blandade_fotnoter_vektoriserad():
+    artikelpd = retrieverrens(blandad_export())
+    assert artikelpd.attrs["format"] == "webbartikel"
+    kontrollera(artikelpd)
+
+
+def test_blandade_fotnoter_strömmande():
+    data = blandad_export().replace("\n", "\r\n").encode("utf-16")
+    artikelpd = retrieverrens_fil(BytesIO(data))
+    assert artikelpd.attrs["format"] == "webbartikel"
+    kontrollera(artikelpd)
+
+
+def test_blandade_fotnoter_index():
+    data = blandad_export().replace("\n", "\r\n").encode("utf-16")
+    kontrollera(Artikelindex(data).till_dataframe())
+
+
+@pytest.mark.parametrize("indexera", [False, True])
+def test_oavkodbara_byte_ger_fel(indexera):
+    data = blandad_export().encode("utf-8")
+    resultat = parsa_fil("trasig.txt", data[:9000] + b"\xff" + data[9000:], indexera=indexera)
+    assert resultat.df is None
+    assert "decode" in resultat.fel
+
+
+def test_index_okänd_fil_utan_separator():
+    with pytest.raises(ValueError):
+        Artikelindex("Bara vanlig text\nutan separatorer.\n".encode("utf-8"))
+
+
+def test_index_avklippt_tecken_i_huvudet():
+    # Huvudfönstret (INDEX_HUVUD_BYTE) klipper ett "ä" mitt i för någon av förskjutningarna
+    text = "Rubrik\nTidning, 2024-01-01\nSida 1\n\n" + "ä" * 2000 + "\n\nSe webartikeln på\nhttp://ret.nu/X1\n"
+    for förskjutning in range(2):
+        data = (" " * förskjutning + text + "=" * 78 + "\n").encode("utf-8")
+        index = Artikelindex(data)
+        assert len(index) == 1
+        assert index[0].text.strip() == "ä" * 2000
+
+
+@pytest.mark.parametrize("indexera", [False, True])
+def test_copyright_i_brödtexten(indexera):
+    # Äldre format: bara hela blocket "©…", tomrad, "Läs hela…" är fotnot
+    text = HUVUD + "".join(
+        f"Rubrik {nr}\nTidning, 2024-01-02\nSida 1\n\nFörsta stycket.\n\nFoto: © TT\n\nAndra stycket.\n\n"
+        f"© Tidning 2024\n\nLäs hela artikeln på http://ret.nu/A{nr}\n" + "=" * 78 + "\n\n"
+        for nr in range(3)
+    )
+    artikelpd = parsa_fil("upphov.txt", text.encode("utf-8"), indexera=indexera).df
+    assert artikelpd.attrs["format"] == "äldre"
+    assert artikelpd["text"].str.strip().tolist() == ["Första stycket.  Foto: © TT  Andra stycket."] * 3
+    assert artikelpd["länk"].tolist() == [f"http://ret.nu/A{nr}" for nr in range(3)]
+
+
+def test_copyright_i_brödtexten_okänt_format():
+    # Inget känt kännetecken: alla artikelslutsmönster provas, men ingen ensam markör kapar texten
+    text = "".join(
+        f"Rubrik {nr}\nTidning, 2024-01-02\nSida 1\n\nFoto: © TT\nLäs hela artikeln på sidan 2.\n" + "=" * 78 + "\n\n"
+        for nr in range(3)
+    )
+    artikelpd = retrieverrens_fil(BytesIO(text.encode("utf-8")))
+    assert artikelpd.attrs["format"] == "okänt"
+    assert artikelpd["text"].str.strip().tolist() == ["Foto: © TT Läs hela artikeln på sidan 2."] * 3
+
+
+@pytest.mark.parametrize("text", ["", HUVUD, "Rubrik\nIngen datumrad\n\ntext"])
+def test_retrieverrens_utan_tidning_och_datum(text):
+    artikelpd = retrieverrens(text)
+    assert len(artikelpd) == 1
+    assert artikelpd.iloc[0][["tidning", "datum"]].tolist() == ["NA", ""]